@@ -3,17 +3,11 @@
 Check enrichment statistics and calculate API costs.
 """
 
-import os
 import json
-from dotenv import load_dotenv
-from supabase import create_client
+from utils.supabase_client import get_client
 from datetime import datetime
 
-load_dotenv()
-
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-supabase = create_client(supabase_url, supabase_key)
+supabase = get_client()
 
 print('='*80)
 print('📊 ENRICHMENT STATISTICS & COST ANALYSIS')
@@ -27,47 +21,28 @@ try:
         print('\n📝 Smart Enrichment Log:')
         print(f'  • Records tracked: {len(enriched_ids)}')
         if enriched_ids:
-            # Get dates
-            dates = list(enriched_ids.values())
-            dates.sort()
-            print(f'  • First enrichment: {dates[0][:10]}')
-            print(f'  • Last enrichment: {dates[-1][:10]}')
+            # ISO timestamps sort lexically, so min/max give the range without sorting
+            first_date = min(enriched_ids.values())
+            last_date = max(enriched_ids.values())
+            print(f'  • First enrichment: {first_date[:10]}')
+            print(f'  • Last enrichment: {last_date[:10]}')
 except:
     print('  • No enrichment log found')
 
 # Query database for enriched records
 print('\n📊 Database Statistics by Platform:')
 
-platforms = ['showsubmit', 'artcall', 'zapplication', 'cafe', 'artwork_archive']
+# Counts are aggregated server-side (see enrichment_stats() in DATABASE_SETUP.md)
+# so descriptions never leave the database; a record counts as enriched if it
+# has city/state or a meaningful description.
+platform_details = supabase.rpc('enrichment_stats', {}).execute().data or []
 total_enriched = 0
-platform_details = []
-
-for platform in platforms:
-    # Count records with enriched fields
-    all_records = supabase.table('opportunities').select('id, location_city, location_state, description').eq('source_platform', platform).execute()
-    
-    if all_records.data:
-        with_city = sum(1 for r in all_records.data if r.get('location_city'))
-        with_state = sum(1 for r in all_records.data if r.get('location_state'))
-        with_desc = sum(1 for r in all_records.data if r.get('description') and len(r.get('description', '')) > 100)
-        
-        # Consider enriched if has city/state or meaningful description
-        enriched = sum(1 for r in all_records.data if 
-                      (r.get('location_city') or r.get('location_state')) or 
-                      (r.get('description') and len(r.get('description', '')) > 100))
-        
-        total_enriched += enriched
-        
-        platform_details.append({
-            'name': platform,
-            'total': len(all_records.data),
-            'with_city': with_city,
-            'with_state': with_state,
-            'with_desc': with_desc,
-            'enriched': enriched
-        })
-        
-        print(f'  {platform:20} Total: {len(all_records.data):3} | City: {with_city:3} | State: {with_state:3} | Desc: {with_desc:3} | Enriched: {enriched:3}')
+total_records = 0
+
+for p in platform_details:
+    total_enriched += p['enriched']
+    total_records += p['total']
+    print(f"  {p['source_platform']:20} Total: {p['total']:3} | City: {p['with_city']:3} | State: {p['with_state']:3} | Desc: {p['with_desc']:3} | Enriched: {p['enriched']:3}")
 
 print(f'\n  TOTAL ENRICHED: ~{total_enriched} records')
 
@@ -109,7 +84,6 @@ print()
 print(f'  Average cost per enrichment: ${total_cost/estimated_api_calls:.5f}')
 
 # Projection for full database
-total_records = sum(p['total'] for p in platform_details)
 remaining_to_enrich = total_records - total_enriched
 
 if remaining_to_enrich > 0:
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
-import json
+from utils.json_io import iter_opportunities
 
-with open('data/opportunities_20250829_144540.json') as f:
-    data = json.load(f)
+# Stream the file: only the first 3 ShowSubmit records are kept for display
+showsubmit_count = 0
 
-showsubmit = [o for o in data if o.get('source_platform') == 'showsubmit']
-
-print(f"Found {len(showsubmit)} ShowSubmit opportunities in JSON\n")
-
-for i, opp in enumerate(showsubmit[:3], 1):
-    print(f"[{i}] {opp.get('title')}")
+for opp in iter_opportunities('data/opportunities_20250829_144540.json'):
+    if opp.get('source_platform') != 'showsubmit':
+        continue
+    
+    showsubmit_count += 1
+    if showsubmit_count > 3:
+        continue
+    
+    print(f"[{showsubmit_count}] {opp.get('title')}")
     print(f"    location: {opp.get('location')}")
     desc = opp.get('description', '')
     if desc:
@@ -17,4 +20,6 @@ for i, opp in enumerate(showsubmit[:3], 1):
         print(f"    description: {desc[:200]}...")
     else:
         print(f"    description: None or empty")
-    print()
\ No newline at end of file
+    print()
+
+print(f"Found {showsubmit_count} ShowSubmit opportunities in JSON")
@@ -3,37 +3,27 @@
 Check raw ShowSubmit data to understand Email location issue.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv()
+from utils.supabase_client import get_client
 
 def main():
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-    
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = get_client()
     
-    # Get ShowSubmit opportunities
-    response = supabase.table('opportunities').select('*').eq(
+    # Counts come from the server; only the examples are fetched
+    response = supabase.table('opportunities').select('id', count='exact').eq(
         'source_platform', 'showsubmit'
-    ).execute()
-    
-    showsubmit_opps = response.data
-    print(f"Found {len(showsubmit_opps)} ShowSubmit opportunities\n")
+    ).limit(1).execute()
+    print(f"Found {response.count or 0} ShowSubmit opportunities\n")
     
-    # Check first few with Email location
-    email_locations = []
-    for opp in showsubmit_opps:
-        loc = opp.get('location_raw')
-        if loc and 'email' in str(loc).lower():
-            email_locations.append(opp)
+    # First few with Email location
+    response = supabase.table('opportunities').select(
+        'title, location_raw, location_city, location_state, description', count='exact'
+    ).eq('source_platform', 'showsubmit').ilike('location_raw', '%email%').limit(3).execute()
+    email_locations = response.data
     
-    print(f"Found {len(email_locations)} with 'Email' in location\n")
+    print(f"Found {response.count or 0} with 'Email' in location\n")
     
     # Show first 3 examples
-    for i, opp in enumerate(email_locations[:3], 1):
+    for i, opp in enumerate(email_locations, 1):
         print(f"[{i}] {opp['title']}")
         print(f"    location_raw: {repr(opp.get('location_raw'))}")
         print(f"    location_city: {repr(opp.get('location_city'))}")
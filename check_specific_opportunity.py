@@ -3,22 +3,15 @@
 Check what data we have for specific ShowSubmit opportunity.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv()
+from utils.supabase_client import get_client
 
 def main():
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-    
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = get_client()
     
     # Find the NJWS opportunity
-    response = supabase.table('opportunities').select('*').ilike(
-        'title', '%83rd%Annual%Open%Juried%'
-    ).execute()
+    response = supabase.table('opportunities').select(
+        'title, organization, url, location_raw, description'
+    ).ilike('title', '%83rd%Annual%Open%Juried%').limit(5).execute()
     
     if response.data:
         for opp in response.data:
@@ -30,7 +23,8 @@ def main():
             print(f"\nWhat Haiku sees:")
             print(f"  Title: {opp['title']}")
             print(f"  Organization: {opp.get('organization')}")
-            print(f"  Description: {opp.get('description') or f'Organization: {opp.get('organization')}'}")
+            fallback = f"Organization: {opp.get('organization')}"
+            print(f"  Description: {opp.get('description') or fallback}")
             print()
 
 if __name__ == "__main__":
@@ -4,72 +4,65 @@ Clean up bad Zapplication descriptions in the database.
 Remove contact info that was incorrectly saved as descriptions.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+from utils.supabase_client import get_client
 
-load_dotenv()
+# Text that marks a description as scraped contact/application info.
+# Keep in sync with is_bad_zapp_description() in DATABASE_SETUP.md.
+BAD_DESCRIPTION_MARKERS = [
+    'Contact Information:', 
+    'Ph:', 
+    'fairs@',
+    'Images:', 
+    'booth shot is required',
+    'Location:'  # These are just repeating the location field
+]
 
 def clean_zapplication_descriptions():
     """Remove bad descriptions from Zapplication opportunities."""
     
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = get_client()
     
     print("="*70)
     print("CLEANING ZAPPLICATION DESCRIPTIONS")
     print("="*70)
     
-    # Get all Zapplication opportunities
-    response = supabase.table('opportunities').select('id, title, description').eq('source_platform', 'zapplication').execute()
+    # Count Zapplication opportunities
+    response = supabase.table('opportunities').select('id', count='exact').eq('source_platform', 'zapplication').limit(1).execute()
     
-    if not response.data:
+    total = response.count or 0
+    if not total:
         print("No Zapplication opportunities found")
         return
     
-    total = len(response.data)
     print(f"Found {total} Zapplication opportunities")
     
-    # Find bad descriptions
-    bad_descriptions = []
-    for opp in response.data:
-        desc = opp.get('description', '')
-        if desc and any(bad in desc for bad in [
-            'Contact Information:', 
-            'Ph:', 
-            'fairs@',
-            'Images:', 
-            'booth shot is required',
-            'Location:'  # These are just repeating the location field
-        ]):
-            bad_descriptions.append(opp)
+    # Count bad descriptions and fetch a few examples in one request
+    examples = supabase.rpc('zapp_bad_description_sample', {'sample_size': 5}).execute().data or []
     
-    print(f"Found {len(bad_descriptions)} opportunities with bad descriptions")
+    bad_count = examples[0]['bad_count'] if examples else 0
+    print(f"Found {bad_count} opportunities with bad descriptions")
     
-    if bad_descriptions:
+    cleared_count = 0
+    if bad_count:
         print("\nExamples of bad descriptions to remove:")
-        for opp in bad_descriptions[:5]:
+        for opp in examples:
             print(f"  • {opp['title'][:50]}")
             print(f"    {opp['description'][:100]}...")
         
-        print(f"\nClearing {len(bad_descriptions)} bad descriptions...")
+        print(f"\nClearing {bad_count} bad descriptions...")
         
-        # Clear the bad descriptions
-        for opp in bad_descriptions:
-            supabase.table('opportunities').update({
-                'description': ''  # Clear the description
-            }).eq('id', opp['id']).execute()
+        # Clear the bad descriptions in a single server-side UPDATE
+        cleared_count = supabase.rpc('clean_zapp_descriptions', {}).execute().data or 0
         
-        print(f"✅ Cleared {len(bad_descriptions)} bad descriptions")
+        print(f"✅ Cleared {cleared_count} bad descriptions")
     
     # Stats after cleaning
-    remaining_with_desc = total - len(bad_descriptions)
+    remaining_with_desc = total - cleared_count
     print(f"\n📊 Final stats:")
     print(f"  • Total Zapplication opportunities: {total}")
-    print(f"  • Cleaned bad descriptions: {len(bad_descriptions)}")
+    print(f"  • Cleaned bad descriptions: {cleared_count}")
     print(f"  • Remaining with descriptions: {remaining_with_desc}")
     print("\nThese opportunities are now ready for AI enrichment!")
 
 if __name__ == "__main__":
-    clean_zapplication_descriptions()
\ No newline at end of file
+    clean_zapplication_descriptions()
@@ -5,19 +5,23 @@ Handles Supabase connection, data ingestion, and deduplication.
 """
 
 import os
-import json
 import uuid
 import hashlib
 import logging
+from collections import defaultdict
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional
 from dateutil import parser
 import re
 from dotenv import load_dotenv
+from utils.json_io import iter_opportunities
 
 # Try to import Supabase, but make it optional
 try:
+    import httpx
     from supabase import create_client
+    from postgrest.exceptions import APIError
+    from utils.supabase_client import fetch_all
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
@@ -25,6 +29,70 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Parsing patterns, compiled once for the per-row ingestion path
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')  # YYYY-MM-DD
+_MONTH_DAY_YEAR_RE = re.compile(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})')  # Month DD, YYYY
+_LOCATION_PATTERNS = [
+    re.compile(r'^([^,]+),\s*([A-Z]{2})$'),  # City, ST
+    re.compile(r'^([^,]+),\s*([A-Za-z\s]+)$'),  # City, State Name
+]
+_FEE_RE = re.compile(r'\$?\s*(\d+(?:\.\d{2})?)')
+
+# Raw fields that get their own columns; everything else goes to extras
+_NORMALIZED_KEYS = frozenset(['title', 'organization', 'url', 'deadline', 'location', 'fee', 'description'])
+
+# Namespace for deterministic opportunity ids (uuid5)
+_ID_NAMESPACE_BYTES = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8').bytes
+
+# Rows per bulk upsert request
+UPSERT_BATCH_SIZE = 500
+
+# Longest description stored per opportunity
+MAX_DESCRIPTION_LENGTH = 5000
+
+# Rows requested per page when loading existing opportunities for dedup
+EXISTING_PAGE_SIZE = 5000
+
+def _token_signature(title_lower: str):
+    """Return a title's token set and a 64-bit bitmap of its token hashes."""
+    tokens = frozenset(title_lower.split())
+    bitmap = 0
+    for token in tokens:
+        bitmap |= 1 << (hash(token) & 63)
+    return tokens, bitmap
+
+class DuplicateIndex:
+    """Hash indexes over known opportunities so duplicate checks avoid a full scan."""
+    
+    def __init__(self, opportunities: Optional[List[Dict[str, Any]]] = None):
+        self.opportunities = []
+        self.tokens = []
+        self.bitmaps = []
+        self.by_url = defaultdict(list)
+        self.by_title = defaultdict(list)
+        # (organization, title token) -> positions, for similar-title candidates
+        self.by_org_token = defaultdict(list)
+        
+        for opp in opportunities or []:
+            self.add(opp)
+    
+    def add(self, opportunity: Dict[str, Any]):
+        """Index an opportunity for future lookups."""
+        position = len(self.opportunities)
+        self.opportunities.append(opportunity)
+        
+        title_lower = opportunity['title'].lower()
+        org_lower = (opportunity.get('organization') or '').lower()
+        tokens, bitmap = _token_signature(title_lower)
+        self.tokens.append(tokens)
+        self.bitmaps.append(bitmap)
+        
+        self.by_url[opportunity['url']].append(position)
+        self.by_title[title_lower].append(position)
+        if org_lower:
+            for token in tokens:
+                self.by_org_token[(org_lower, token)].append(position)
+
 class OpportunityDatabase:
     """Manages database operations for art opportunities."""
     
@@ -48,37 +116,44 @@ class OpportunityDatabase:
     
     def generate_deterministic_id(self, source: str, unique_str: str) -> str:
         """Generate a deterministic UUID from source and unique string."""
-        # Use namespace UUID for consistency
-        namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')
-        return str(uuid.uuid5(namespace, f"{source}:{unique_str}"))
+        # Equivalent to uuid.uuid5(namespace, name) without rebuilding the namespace per call
+        digest = hashlib.sha1(_ID_NAMESPACE_BYTES + f"{source}:{unique_str}".encode('utf-8')).digest()
+        return str(uuid.UUID(bytes=digest[:16], version=5))
     
     def parse_deadline(self, deadline_raw: str) -> Optional[date]:
         """Parse deadline text into a date object."""
         if not deadline_raw:
             return None
         
+        # Bare YYYY-MM-DD is the common case; fromisoformat handles it in C
+        if len(deadline_raw) == 10 and deadline_raw[4] == deadline_raw[7] == '-':
+            try:
+                return date.fromisoformat(deadline_raw)
+            except ValueError:
+                pass
+        
+        # Cheap pattern checks first; dateutil's fuzzy parse is slow
+        match = _ISO_DATE_RE.search(deadline_raw)
+        if match:
+            try:
+                return date(*map(int, match.groups()))
+            except ValueError:
+                pass
+        
+        match = _MONTH_DAY_YEAR_RE.search(deadline_raw)
+        if match:
+            month_day_year = ' '.join(match.groups())
+            for fmt in ('%B %d %Y', '%b %d %Y'):
+                try:
+                    return datetime.strptime(month_day_year, fmt).date()
+                except ValueError:
+                    continue
+        
         try:
             # Handle various formats
             parsed = parser.parse(deadline_raw, fuzzy=True)
             return parsed.date()
-        except:
-            # Try manual patterns
-            patterns = [
-                r'(\d{4})-(\d{2})-(\d{2})',  # YYYY-MM-DD
-                r'(\w+)\s+(\d{1,2}),?\s+(\d{4})',  # Month DD, YYYY
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, deadline_raw)
-                if match:
-                    try:
-                        if '-' in deadline_raw:
-                            return date(*map(int, match.groups()))
-                        else:
-                            return parser.parse(' '.join(match.groups())).date()
-                    except:
-                        continue
-            
+        except (ValueError, OverflowError, TypeError):
             return None
     
     def parse_location(self, location_raw: str) -> Dict[str, str]:
@@ -93,13 +168,9 @@ class OpportunityDatabase:
             return result
         
         # Try common patterns
-        patterns = [
-            r'^([^,]+),\s*([A-Z]{2})$',  # City, ST
-            r'^([^,]+),\s*([A-Za-z\s]+)$',  # City, State Name
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, location_raw.strip())
+        location_stripped = location_raw.strip()
+        for pattern in _LOCATION_PATTERNS:
+            match = pattern.match(location_stripped)
             if match:
                 result['location_city'] = match.group(1).strip()
                 result['location_state'] = match.group(2).strip()
@@ -124,15 +195,31 @@ class OpportunityDatabase:
             result['fee_amount'] = 0
             return result
         
+        # Plain amounts like "$15" or "22.50" (the normalized scraper format) skip the regex
+        whole, _, cents = fee_raw.lstrip('$').partition('.')
+        if whole.isdecimal() and (not cents or (len(cents) == 2 and cents.isdecimal())):
+            result['fee_amount'] = float(f"{whole}.{cents or 0}")
+            return result
+        
         # Extract numeric amount
-        match = re.search(r'\$?\s*(\d+(?:\.\d{2})?)', fee_raw)
+        match = _FEE_RE.search(fee_raw)
         if match:
             result['fee_amount'] = float(match.group(1))
         
         return result
     
-    def normalize_opportunity(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalize opportunity data for database insertion."""
+    def normalize_opportunity(self, raw_data: Dict[str, Any], now_iso: Optional[str] = None,
+                              today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Normalize opportunity data for database insertion.
+        
+        Batch callers pass now_iso/today once instead of reading the clock per row.
+        """
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+        if today is None:
+            today = date.today()
+        
         # Generate deterministic ID
         source = raw_data.get('source_platform', 'unknown')
         unique_str = raw_data.get('url', '') or raw_data.get('id', '') or raw_data.get('title', '')
@@ -142,6 +229,10 @@ class OpportunityDatabase:
         fee_data = self.parse_fee(raw_data.get('fee', ''))
         deadline_parsed = self.parse_deadline(raw_data.get('deadline', ''))
         
+        description = raw_data.get('description') or ''
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            description = description[:MAX_DESCRIPTION_LENGTH]
+        
         # Build normalized record
         normalized = {
             'id': self.generate_deterministic_id(source, unique_str),
@@ -161,70 +252,66 @@ class OpportunityDatabase:
             **fee_data,
             
             # Other fields
-            'description': raw_data.get('description', '')[:5000] if raw_data.get('description') else '',
+            'description': description,
             'eligibility': raw_data.get('eligibility', ''),
             'email': raw_data.get('email', ''),
             
             # Platform-specific data in extras
-            'extras': {
-                k: v for k, v in raw_data.items() 
-                if k not in ['title', 'organization', 'url', 'deadline', 'location', 'fee', 'description']
-            },
+            'extras': {k: raw_data[k] for k in raw_data.keys() - _NORMALIZED_KEYS},
             
             # Platform ID if available
             'platform_id': raw_data.get('platform_id') or raw_data.get('zapp_id') or raw_data.get('id'),
             
             # Tracking
-            'is_active': True if not deadline_parsed or deadline_parsed >= date.today() else False,
-            'last_seen': datetime.now().isoformat(),
+            'is_active': not deadline_parsed or deadline_parsed >= today,
+            'last_seen': now_iso,
         }
         
         return normalized
     
-    def find_duplicates(self, opportunity: Dict[str, Any], existing: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find potential duplicates in existing opportunities."""
-        duplicates = []
-        
+    def find_duplicates(self, opportunity: Dict[str, Any], index: DuplicateIndex) -> List[Dict[str, Any]]:
+        """Find potential duplicates among indexed opportunities."""
         title_lower = opportunity['title'].lower()
         org_lower = (opportunity.get('organization') or '').lower()
         
-        for existing_opp in existing:
-            # Check for exact URL match
-            if existing_opp['url'] == opportunity['url']:
-                duplicates.append(existing_opp)
-                continue
+        # Exact URL or title matches
+        matches = set(index.by_url.get(opportunity['url'], ()))
+        matches.update(index.by_title.get(title_lower, ()))
+        
+        # Title + org match: only titles sharing a token can be similar
+        if org_lower:
+            tokens, bitmap = _token_signature(title_lower)
+            candidates = set()
+            for token in tokens:
+                candidates.update(index.by_org_token.get((org_lower, token), ()))
             
-            # Check for very similar titles
-            existing_title = existing_opp['title'].lower()
-            if title_lower == existing_title:
-                duplicates.append(existing_opp)
-                continue
+            # Local bindings keep attribute lookups out of the comparison loop
+            bitmaps = index.bitmaps
+            index_tokens = index.tokens
+            similarity = self._string_similarity
             
-            # Check for title + org match
-            if org_lower and org_lower == (existing_opp.get('organization') or '').lower():
-                # Calculate title similarity
-                title_similarity = self._string_similarity(title_lower, existing_title)
+            for position in candidates - matches:
+                # Popcount estimate on the bitmaps prunes clear non-matches cheaply
+                other_bitmap = bitmaps[position]
+                if 2 * (bitmap & other_bitmap).bit_count() < (bitmap | other_bitmap).bit_count():
+                    continue
+                
+                title_similarity = similarity(tokens, index_tokens[position])
                 if title_similarity > 0.85:  # 85% similar
-                    duplicates.append(existing_opp)
+                    matches.add(position)
         
-        return duplicates
+        # Keep the original ordering so the first-seen record wins
+        return [index.opportunities[position] for position in sorted(matches)]
     
-    def _string_similarity(self, s1: str, s2: str) -> float:
-        """Calculate simple string similarity ratio."""
-        if not s1 or not s2:
-            return 0.0
-        
-        # Simple character overlap ratio
-        set1 = set(s1.split())
-        set2 = set(s2.split())
-        
-        if not set1 or not set2:
+    def _string_similarity(self, tokens1: frozenset, tokens2: frozenset) -> float:
+        """Calculate Jaccard similarity between two title token sets."""
+        if not tokens1 or not tokens2:
             return 0.0
         
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
+        intersection = len(tokens1 & tokens2)
+        union = len(tokens1) + len(tokens2) - intersection
         
-        return intersection / union if union > 0 else 0.0
+        return intersection / union
     
     def upsert_opportunity(self, opportunity: Dict[str, Any]) -> Dict[str, Any]:
         """Insert or update an opportunity in the database."""
@@ -232,76 +319,103 @@ class OpportunityDatabase:
             return {"status": "skipped", "reason": "No database connection"}
         
         try:
-            # Check if opportunity exists
-            response = self.client.table('opportunities').select('*').eq('id', opportunity['id']).execute()
+            # One round trip; the opportunities_preserve_history trigger keeps
+            # times_seen, first_seen and organization for existing rows
+            now = datetime.now().isoformat()
+            row = {**opportunity, 'first_seen': opportunity.get('first_seen') or now, 'times_seen': opportunity.get('times_seen') or 1}
+            row.setdefault('last_seen', now)
             
-            if response.data:
-                # Update existing
-                existing = response.data[0]
-                
-                # Update last_seen and increment times_seen
-                opportunity['times_seen'] = existing.get('times_seen', 1) + 1
-                opportunity['first_seen'] = existing.get('first_seen')
-                
-                # Preserve some existing data if new data is empty
-                if not opportunity.get('organization') and existing.get('organization'):
-                    opportunity['organization'] = existing['organization']
-                
-                # Update
-                response = self.client.table('opportunities').update(opportunity).eq('id', opportunity['id']).execute()
-                return {"status": "updated", "id": opportunity['id']}
-            else:
-                # Insert new
-                opportunity['first_seen'] = datetime.now().isoformat()
-                opportunity['times_seen'] = 1
-                
-                response = self.client.table('opportunities').insert(opportunity).execute()
-                return {"status": "inserted", "id": opportunity['id']}
+            response = self.client.table('opportunities').upsert(
+                row, on_conflict='id', returning='representation'
+            ).execute()
+            
+            # The trigger bumps times_seen past 1 only when an existing row was hit
+            written = response.data[0] if response.data else {}
+            status = "updated" if (written.get('times_seen') or 1) > 1 else "inserted"
+            return {"status": status, "id": opportunity['id']}
                 
         except Exception as e:
             logger.error(f"Database error: {e}")
             return {"status": "error", "error": str(e)}
     
-    def ingest_from_json(self, json_path: str) -> Dict[str, Any]:
-        """Ingest opportunities from JSON file."""
-        logger.info(f"Loading data from {json_path}")
+    def upsert_opportunities(self, opportunities: List[Dict[str, Any]], batch_size: int = UPSERT_BATCH_SIZE,
+                             now_iso: Optional[str] = None) -> set:
+        """
+        Insert or update opportunities in batches.
+        
+        times_seen, first_seen and organization are preserved for existing rows
+        by the opportunities_preserve_history trigger (see DATABASE_SETUP.md).
+        Returns the ids of the rows that were written.
+        """
+        written_ids = set()
+        if not self.use_supabase or not self.client:
+            return written_ids
         
-        with open(json_path, 'r') as f:
-            data = json.load(f)
+        now = now_iso or datetime.now().isoformat()
         
-        # Handle different JSON formats
-        if isinstance(data, dict) and 'opportunities' in data:
-            opportunities = data['opportunities']
-        elif isinstance(data, list):
-            opportunities = data
-        else:
-            opportunities = [data]
+        # Bulk upserts need the same columns in every row, so group by column set
+        groups = {}
+        for opp in opportunities:
+            row = {**opp, 'first_seen': opp.get('first_seen') or now, 'times_seen': opp.get('times_seen') or 1}
+            row.setdefault('last_seen', now)
+            groups.setdefault(frozenset(row), []).append(row)
         
-        logger.info(f"Processing {len(opportunities)} opportunities")
+        for rows in groups.values():
+            for i in range(0, len(rows), batch_size):
+                chunk = rows[i:i + batch_size]
+                try:
+                    self.client.table('opportunities').upsert(
+                        chunk, on_conflict='id', returning='minimal'
+                    ).execute()
+                    written_ids.update(row['id'] for row in chunk)
+                except Exception as e:
+                    logger.error(f"Database error upserting {len(chunk)} opportunities: {e}")
+        
+        return written_ids
+    
+    def ingest_from_json(self, json_path: str) -> Dict[str, Any]:
+        """Ingest opportunities from JSON file."""
+        logger.info(f"Loading data from {json_path}")
         
         results = {
-            'total': len(opportunities),
+            'total': 0,
             'inserted': 0,
             'updated': 0,
             'errors': 0,
             'skipped': 0
         }
         
-        # Get existing opportunities for deduplication
-        existing = []
+        # One timestamp for the whole ingest
+        now_iso = datetime.now().isoformat()
+        today = date.today()
+        
+        # Page existing opportunities straight into the dedup index
+        existing_ids = set()
+        index = DuplicateIndex()
         if self.use_supabase and self.client:
             try:
-                response = self.client.table('opportunities').select('id, title, organization, url').execute()
-                existing = response.data
-            except:
-                pass
+                existing = fetch_all(
+                    self.client.table('opportunities').select('id, title, organization, url').order('id'),
+                    page_size=EXISTING_PAGE_SIZE,
+                )
+            except (APIError, httpx.HTTPError) as e:
+                logger.warning(f"Could not load existing opportunities for dedup: {e}")
+                existing = []
+            for existing_opp in existing:
+                existing_ids.add(existing_opp['id'])
+                index.add(existing_opp)
         
-        for raw_opp in opportunities:
+        # Collect rows keyed by id: one upsert statement can't touch the same row twice
+        rows = {}
+        # Stream records straight into normalization
+        for raw_opp in iter_opportunities(json_path):
+            results['total'] += 1
+            
             # Normalize data
-            normalized = self.normalize_opportunity(raw_opp)
+            normalized = self.normalize_opportunity(raw_opp, now_iso, today)
             
             # Check for duplicates
-            duplicates = self.find_duplicates(normalized, existing)
+            duplicates = self.find_duplicates(normalized, index)
             if duplicates and normalized['source_platform'] != duplicates[0].get('source_platform'):
                 # This is a cross-platform duplicate
                 logger.info(f"Found duplicate: {normalized['title']} on {normalized['source_platform']}")
@@ -310,19 +424,29 @@ class OpportunityDatabase:
                     duplicates[0]['alternate_urls'] = []
                 duplicates[0]['alternate_urls'].append(normalized['url'])
                 normalized = duplicates[0]  # Use existing record
+            elif normalized['id'] not in rows and normalized['id'] not in existing_ids:
+                index.add(normalized)  # Index for future duplicate checks
+            
+            rows[normalized['id']] = normalized
+        
+        logger.info(f"Processed {results['total']} opportunities")
+        
+        if not self.use_supabase or not self.client:
+            results['skipped'] = results['total']
+        else:
+            # Repeated ids in the input collapse into a single row
+            results['skipped'] = results['total'] - len(rows)
             
-            # Upsert to database
-            result = self.upsert_opportunity(normalized)
+            # Upsert in batches
+            written_ids = self.upsert_opportunities(list(rows.values()), now_iso=now_iso)
             
-            if result['status'] == 'inserted':
-                results['inserted'] += 1
-                existing.append(normalized)  # Add to existing for future duplicate checks
-            elif result['status'] == 'updated':
-                results['updated'] += 1
-            elif result['status'] == 'error':
-                results['errors'] += 1
-            else:
-                results['skipped'] += 1
+            for opp_id in rows:
+                if opp_id not in written_ids:
+                    results['errors'] += 1
+                elif opp_id in existing_ids:
+                    results['updated'] += 1
+                else:
+                    results['inserted'] += 1
         
         logger.info(f"Ingestion complete: {results}")
         return results
@@ -5,51 +5,227 @@ The scraper only gets data from the listing page, but each opportunity has a ful
 """
 
 import os
+import re
+import argparse
 import json
 import time
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils.haiku import HAIKU_MODEL, HAIKU_WORKERS, RateLimiter, ResponseCache, complete, fit_lines, forced_tool, get_anthropic_client, prompt_blocks, truncate_tokens, run_message_batch
+
+# lxml is a much faster tree builder than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# selectolax (Lexbor) parses and matches CSS selectors in C; bs4 is the fallback
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# Concurrent page fetches; kept small to be polite to artcall.org
+FETCH_WORKERS = 8
+
+# Opportunity columns the enrichment reads; nothing else is fetched or kept
+ENRICH_COLUMNS = ('id', 'title', 'organization', 'url', 'location_raw', 'deadline_raw', 'fee_raw')
+
+# Bump when the prompt or tool schema changes so older enrichments are redone
+ENRICHMENT_VERSION = 1
+
+# Concurrent Supabase updates; writes start as soon as each enrichment arrives
+DB_WRITERS = 2
+
+# Fetched pages are kept on disk and reused for a day, then revalidated
+HTML_CACHE_DIR = 'data/html_cache'
+HTML_CACHE_TTL = 24 * 3600
+
+# Approximate token budgets for the page text and each field hint in the prompt
+DESCRIPTION_TOKEN_BUDGET = 600
+HINT_TOKEN_BUDGET = 120
+
+# A line found on at least this many fetched pages is site template, not content
+BOILERPLATE_MIN_PAGES = 3
+
+# Candidate main content containers, most specific first
+MAIN_CONTENT_SELECTORS = ['div.container', 'main', 'div#content', 'article']
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'strong']
+
+# Field hints; venue is searched in headings, the rest in one pass over the page
+# text lines, with each line labelled by the first field it matches
+VENUE_HEADING_RE = re.compile(r'gallery|museum|center|studio|space', re.IGNORECASE)
+FIELD_LINE_RE = re.compile(
+    r'^(?:(?P<address_hint>.*(?:Street|Avenue|Road|Boulevard).*)'
+    r'|(?P<eligibility_details>.*(?i:eligib).*)'
+    r'|(?P<awards_info>.*(?i:award|prize).*))$',
+    re.MULTILINE
+)
+FIELD_HINT_KEYS = ('address_hint', 'eligibility_details', 'awards_info')
+
+# Static half of the enrichment prompt; sent first so it can be prompt-cached
+ENRICHMENT_INSTRUCTIONS = """Analyze the art opportunity below and provide comprehensive information.
+
+Extract and provide:
+1. Complete location information (venue, address, city, state)
+2. A comprehensive 3-sentence summary for artists
+3. Keywords and opportunity classification
+
+Call return_enrichment with what you find."""
+
+# Forcing this tool makes Haiku answer with a schema-shaped object instead of prose around JSON
+ENRICHMENT_TOOL = {
+    "name": "return_enrichment",
+    "description": "Record the structured details extracted from an art opportunity page.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "object",
+                "properties": {
+                    "venue": {"type": "string", "description": "specific venue/gallery name"},
+                    "address": {"type": "string", "description": "street address if found"},
+                    "city": {"type": "string", "description": "city name"},
+                    "state": {"type": "string", "description": "2-letter state code"},
+                    "country": {"type": "string", "description": "country if not USA"},
+                    "is_online": {"type": "boolean"},
+                },
+            },
+            "summary": {
+                "type": "string",
+                "description": "A 3-sentence summary that covers: (1) What this opportunity is and who it's for, including the hosting organization. (2) Key eligibility requirements, medium restrictions, or selection criteria. (3) Deadline, fee structure, and any awards, prizes, or unique benefits.",
+            },
+            "description": {
+                "type": "string",
+                "description": "A longer 2-3 paragraph description with all important details from the webpage",
+            },
+            "keywords": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
+            "opportunity_type": {
+                "type": "string",
+                "enum": ["exhibition", "fair", "residency", "grant", "competition", "market", "online"],
+            },
+            "eligibility_summary": {"type": "string", "description": "Brief eligibility requirements"},
+            "awards_prizes": {"type": "string", "description": "Any awards or prizes mentioned"},
+            "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        },
+        "required": ["location", "summary", "description", "keywords", "opportunity_type", "confidence"],
+    },
+}
+
+# Per-opportunity half of the prompt, filled from the opportunity row and its fetched page
+DETAILS_TEMPLATE = """Title: {title}
+Organization: {organization}
+URL: {url}
+Current Location: {location_raw}
+Deadline: {deadline_raw}
+Fee: {fee_raw}
+
+FULL DESCRIPTION FROM WEBPAGE:
+{full_description}
+
+Additional hints:
+- Venue/Gallery: {venue_hint}
+- Address: {address_hint}
+- Eligibility: {eligibility_details}
+- Awards: {awards_info}"""
 
 load_dotenv()
 
 class ArtCallFullEnricher:
     def __init__(self):
         """Initialize with Supabase and Anthropic."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        self.supabase = get_client()
+        
+        self.anthropic = get_anthropic_client()
+        self.rate_limiter = RateLimiter()
+        self.response_cache = ResponseCache()
         
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
+        # One pooled session for all page fetches, so connections are kept alive
+        self.http = requests.Session()
+        self.http.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+        })
+        adapter = HTTPAdapter(
+            pool_connections=FETCH_WORKERS,
+            pool_maxsize=FETCH_WORKERS,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+        )
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        os.makedirs(HTML_CACHE_DIR, exist_ok=True)
+    
+    def _extract_main_content(self, html: bytes):
+        """Return the main content text and its heading texts, or (None, [])."""
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+            main_content = next(filter(None, map(tree.css_first, MAIN_CONTENT_SELECTORS)), None) or tree.body
+            if main_content is None:
+                return None, []
+            headings = [elem.text(strip=True) for elem in main_content.css(', '.join(HEADING_TAGS))]
+            return main_content.text(separator='\n', strip=True), headings
+        
+        # Hand over raw bytes so bs4 sniffs the encoding instead of trusting requests' guess
+        soup = BeautifulSoup(html, HTML_PARSER)
+        main_content = next(filter(None, map(soup.select_one, MAIN_CONTENT_SELECTORS)), None) or soup.body
+        if main_content is None:
+            return None, []
+        headings = [elem.get_text(strip=True) for elem in main_content.find_all(HEADING_TAGS)]
+        return main_content.get_text(separator='\n', strip=True), headings
+    
+    def get_page_html(self, url: str) -> bytes:
+        """Page body from the disk cache while fresh; otherwise fetched, revalidating with ETag/Last-Modified."""
+        cache_base = os.path.join(HTML_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest())
+        html_path, meta_path = f"{cache_base}.html", f"{cache_base}.json"
+        
+        headers = {}
+        if os.path.exists(html_path):
+            if time.time() - os.path.getmtime(html_path) < HTML_CACHE_TTL:
+                with open(html_path, 'rb') as f:
+                    return f.read()
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        response = self.http.get(url, timeout=10, headers=headers)
+        if response.status_code == 304:
+            os.utime(html_path)  # Still current; restart the TTL
+            with open(html_path, 'rb') as f:
+                return f.read()
+        response.raise_for_status()
+        
+        with open(html_path, 'wb') as f:
+            f.write(response.content)
+        with open(meta_path, 'w') as f:
+            json.dump({'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}, f)
+        return response.content
     
     def fetch_artcall_page(self, url: str) -> Optional[Dict]:
         """Fetch the full content from an ArtCall opportunity page."""
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            html = self.get_page_html(url)
             
             # Extract the main content area
             content_data = {}
+            all_text, headings = self._extract_main_content(html)
             
-            # Try multiple selectors for the main content
-            main_content = (
-                soup.find('div', class_='container') or 
-                soup.find('main') or 
-                soup.find('div', id='content') or
-                soup.find('article') or
-                soup.body  # Fallback to entire body
-            )
-            
-            if main_content:
-                # Get ALL text content from the page
-                all_text = main_content.get_text(separator='\n', strip=True)
-                
+            if all_text is not None:
                 # Split into lines and filter
                 lines = all_text.split('\n')
                 meaningful_lines = []
@@ -61,36 +237,22 @@ class ArtCallFullEnricher:
                         meaningful_lines.append(line)
                 
                 # Take a good chunk of content
-                content_data['full_description'] = '\n'.join(meaningful_lines[:20])  # First 20 meaningful lines
+                content_data['lines'] = meaningful_lines
+                content_data['full_description'] = fit_lines(meaningful_lines, DESCRIPTION_TOKEN_BUDGET)
                 
                 # Look for specific fields
                 # Venue/Gallery
-                venue_indicators = ['gallery', 'museum', 'center', 'studio', 'space']
-                for elem in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'strong']):
-                    text = elem.get_text(strip=True).lower()
-                    if any(indicator in text for indicator in venue_indicators):
-                        content_data['venue_hint'] = elem.get_text(strip=True)
-                        break
-                
-                # Address
-                address_pattern = main_content.find(text=lambda t: t and ('Street' in t or 'Avenue' in t or 'Road' in t or 'Boulevard' in t))
-                if address_pattern:
-                    content_data['address_hint'] = address_pattern.strip()
+                venue_hint = next(filter(VENUE_HEADING_RE.search, headings), None)
+                if venue_hint:
+                    content_data['venue_hint'] = venue_hint
                 
-                # Eligibility details
-                eligibility_section = main_content.find(text=lambda t: t and 'eligib' in t.lower())
-                if eligibility_section:
-                    # Get the parent element and its text
-                    parent = eligibility_section.parent
-                    if parent:
-                        content_data['eligibility_details'] = parent.get_text(strip=True)[:500]
-                
-                # Awards/Prizes
-                awards_section = main_content.find(text=lambda t: t and ('award' in t.lower() or 'prize' in t.lower()))
-                if awards_section:
-                    parent = awards_section.parent
-                    if parent:
-                        content_data['awards_info'] = parent.get_text(strip=True)[:300]
+                # Address, eligibility and awards: first matching line of each
+                for match in FIELD_LINE_RE.finditer(all_text):
+                    key = match.lastgroup
+                    if key not in content_data:
+                        content_data[key] = truncate_tokens(match.group(0).strip(), HINT_TOKEN_BUDGET)
+                        if all(k in content_data for k in FIELD_HINT_KEYS):
+                            break
             
             return content_data
             
@@ -98,126 +260,189 @@ class ArtCallFullEnricher:
             print(f"    ❌ Error fetching {url}: {e}")
             return None
     
-    def enrich_with_full_content(self, opp: Dict, page_content: Dict) -> Dict:
-        """Use Haiku to extract structured data from the full page content."""
+    def strip_boilerplate(self, pages: List[Optional[Dict]]):
+        """
+        Rebuild each page's full_description without lines shared across many pages.
         
-        title = opp.get('title', '')
-        organization = opp.get('organization', '')
-        location_raw = opp.get('location_raw', '')
-        url = opp.get('url', '')
-        deadline = opp.get('deadline_raw', '')
-        fee = opp.get('fee_raw', '')
+        ArtCall pages come from one template, so navigation and call-for-entry
+        boilerplate would otherwise fill the token budget of every prompt.
+        """
+        fetched = [page for page in pages if page and page.get('lines')]
+        line_counts = Counter(line for page in fetched for line in set(page['lines']))
+        for page in fetched:
+            lines = [line for line in page['lines'] if line_counts[line] < BOILERPLATE_MIN_PAGES]
+            page['full_description'] = fit_lines(lines, DESCRIPTION_TOKEN_BUDGET)
+    
+    def build_prompt(self, opp: Dict, page_content: Dict) -> str:
+        """Build the per-opportunity part of the Haiku prompt from its fetched page."""
+        fields = defaultdict(str, opp)
+        fields.update(page_content)
         
-        # Full description from the page
-        full_description = page_content.get('full_description', '')
-        venue_hint = page_content.get('venue_hint', '')
-        address_hint = page_content.get('address_hint', '')
-        eligibility = page_content.get('eligibility_details', '')
-        awards = page_content.get('awards_info', '')
+        # Hints already quoted in the description would only be billed twice
+        for key in FIELD_HINT_KEYS:
+            if fields[key] and fields[key] in fields['full_description']:
+                fields[key] = ''
         
-        prompt = f"""Analyze this art opportunity and provide comprehensive information.
-
-Title: {title}
-Organization: {organization}
-URL: {url}
-Current Location: {location_raw}
-Deadline: {deadline}
-Fee: {fee}
-
-FULL DESCRIPTION FROM WEBPAGE:
-{full_description}
-
-Additional hints:
-- Venue/Gallery: {venue_hint}
-- Address: {address_hint}
-- Eligibility: {eligibility}
-- Awards: {awards}
-
-Extract and provide:
-1. Complete location information (venue, address, city, state)
-2. A comprehensive 3-sentence summary for artists
-3. Keywords and opportunity classification
-
-Return JSON:
-{{
-    "location": {{
-        "venue": "specific venue/gallery name",
-        "address": "street address if found",
-        "city": "city name",
-        "state": "2-letter state code",
-        "country": "country if not USA",
-        "is_online": true/false
-    }},
-    "summary": "A 3-sentence summary that covers: (1) What this opportunity is and who it's for, including the hosting organization. (2) Key eligibility requirements, medium restrictions, or selection criteria. (3) Deadline, fee structure, and any awards, prizes, or unique benefits.",
-    "description": "A longer 2-3 paragraph description with all important details from the webpage",
-    "keywords": ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"],
-    "opportunity_type": "exhibition|fair|residency|grant|competition|market|online",
-    "eligibility_summary": "Brief eligibility requirements",
-    "awards_prizes": "Any awards or prizes mentioned",
-    "confidence": "high|medium|low"
-}}"""
-
+        return DETAILS_TEMPLATE.format_map(fields)
+    
+    def message_params(self, prompt: str) -> Dict:
+        """messages.create() parameters for an enrichment prompt."""
+        return {
+            'model': HAIKU_MODEL,
+            'max_tokens': 1200,
+            'temperature': 0,
+            'messages': [{"role": "user", "content": prompt_blocks(ENRICHMENT_INSTRUCTIONS, prompt)}],
+            **forced_tool(ENRICHMENT_TOOL),
+        }
+    
+    def enrich_with_full_content(self, opp: Dict, page_content: Dict) -> Optional[Dict]:
+        """Use Haiku to extract structured data from the full page content."""
         try:
-            response = self.anthropic.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1200,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            content = response.content[0].text.strip()
-            
-            # Parse JSON
-            if '{' in content:
-                content = content[content.index('{'):]
-                # Find matching closing brace
-                brace_count = 0
-                for i, char in enumerate(content):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            content = content[:i+1]
-                            break
-            
-            return json.loads(content)
+            return complete(self.anthropic, self.message_params(self.build_prompt(opp, page_content)),
+                            self.rate_limiter, self.response_cache)
             
         except Exception as e:
             print(f"    ❌ Enrichment error: {e}")
             return None
     
-    def process_artcall_opportunities(self, limit: int = 10):
-        """Process ArtCall opportunities with full page content."""
+    def enrich_concurrently(self, pairs: List[Tuple[Dict, Dict]],
+                            on_result: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+        """
+        Enrich (opportunity, page content) pairs with parallel Haiku calls, keyed by opportunity id.
+        
+        on_result is called with each enrichment as soon as it arrives, so
+        the next stage can start without waiting for the slowest call.
+        """
+        enrichments = {}
+        with ThreadPoolExecutor(max_workers=HAIKU_WORKERS) as executor:
+            futures = {
+                executor.submit(self.enrich_with_full_content, opp, page_content): opp['id']
+                for opp, page_content in pairs
+            }
+            for future in as_completed(futures):
+                enriched = future.result()
+                if enriched:
+                    enrichments[futures[future]] = enriched
+                    if on_result:
+                        on_result(futures[future], enriched)
+        return enrichments
+    
+    def enrich_batch(self, pairs: List[Tuple[Dict, Dict]]) -> Dict[str, Dict]:
+        """Enrich (opportunity, page content) pairs in one Message Batches job, keyed by opportunity id."""
+        batch_requests = {
+            opp['id']: self.message_params(self.build_prompt(opp, page_content))
+            for opp, page_content in pairs
+        }
+        
+        results = run_message_batch(self.anthropic, batch_requests, cache=self.response_cache)
+        return {opp_id: enriched for opp_id, enriched in results.items() if enriched}
+    
+    def build_update(self, enriched: Dict) -> Dict:
+        """Opportunity columns to write for a Haiku enrichment."""
+        update_data = {}
+        
+        # Update description with the longer version
+        if enriched.get('description'):
+            update_data['description'] = enriched['description']
+        
+        # Update location
+        location = enriched.get('location', {})
+        if location.get('city') and location.get('state'):
+            update_data['location_city'] = location['city']
+            update_data['location_state'] = location['state']
+            update_data['location_raw'] = f"{location['city']}, {location['state']}"
+        
+        # Add the AI summary (store in a new field or append to description)
+        if enriched.get('summary'):
+            # For now, prepend the summary to the description
+            summary = enriched['summary']
+            if 'description' in update_data:
+                update_data['description'] = summary + "\n\n" + update_data['description']
+            else:
+                update_data['description'] = summary
+        
+        return update_data
+    
+    def write_update(self, opp_id: str, update_data: Dict) -> Optional[str]:
+        """Write one opportunity's update; returns the error message on failure."""
+        try:
+            self.supabase.table('opportunities').update(update_data).eq('id', opp_id).execute()
+            return None
+        except Exception as e:
+            return str(e)
+    
+    def process_artcall_opportunities(self, limit: int = 10, use_batch: bool = False,
+                                      include_enriched: bool = False):
+        """
+        Process ArtCall opportunities with full page content.
+        
+        With use_batch, all Haiku calls go out as one Message Batches job
+        (half price, no rate limiting) instead of rate-limited parallel calls.
+        Rows already enriched at the current ENRICHMENT_VERSION are skipped
+        unless include_enriched is set.
+        """
         
         print("🎨 ArtCall Full Content Enrichment")
         print("="*60)
         
         # Get ArtCall opportunities from database
-        response = self.supabase.table('opportunities').select('*').eq(
+        query = self.supabase.table('opportunities').select(', '.join(ENRICH_COLUMNS)).eq(
             'source_platform', 'artcall'
-        ).limit(limit).execute()
+        )
+        if not include_enriched:
+            query = query.lt('enriched_version', ENRICHMENT_VERSION)
+        response = query.limit(limit).execute()
         
         if not response.data:
             print("No ArtCall opportunities found")
             return
         
-        opportunities = response.data
+        # Normalize once: missing values become '' so the prompt never shows "None"
+        opportunities = [{col: row.get(col) or '' for col in ENRICH_COLUMNS} for row in response.data]
         print(f"Found {len(opportunities)} ArtCall opportunities to enrich\n")
         
         success_count = 0
         
-        for i, opp in enumerate(opportunities, 1):
-            title = opp.get('title', '')
-            url = opp.get('url', '')
+        # Step 1: Fetch all full pages up front; the requests are independent and network-bound
+        print(f"📄 Fetching {len(opportunities)} full pages...\n")
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            pages = list(executor.map(self.fetch_artcall_page, [opp['url'] for opp in opportunities]))
+        self.strip_boilerplate(pages)
+        
+        # Step 2: Enrich with Haiku using the full content
+        ready = [
+            (opp, page_content) for opp, page_content in zip(opportunities, pages)
+            if page_content and page_content.get('full_description')
+        ]
+        
+        # Step 3 overlaps step 2: each enrichment's update is queued for the
+        # writer pool as soon as it arrives
+        enriched_at = datetime.now(timezone.utc).isoformat()
+        writes = {}
+        with ThreadPoolExecutor(max_workers=DB_WRITERS) as writer:
+            def queue_write(opp_id: str, enriched: Dict):
+                update_data = self.build_update(enriched)
+                if update_data:
+                    update_data['enriched_at'] = enriched_at
+                    update_data['enriched_version'] = ENRICHMENT_VERSION
+                    writes[opp_id] = writer.submit(self.write_update, opp_id, update_data)
+            
+            if use_batch:
+                print("🤖 Enriching with AI via Message Batches (this can take a few minutes)...\n")
+                enrichments = self.enrich_batch(ready)
+                for opp_id, enriched in enrichments.items():
+                    queue_write(opp_id, enriched)
+            else:
+                print("🤖 Enriching with AI...\n")
+                enrichments = self.enrich_concurrently(ready, on_result=queue_write)
+        
+        for i, (opp, page_content) in enumerate(zip(opportunities, pages), 1):
+            title = opp['title']
+            url = opp['url']
             
             print(f"[{i}/{len(opportunities)}] {title[:50]}...")
             print(f"  URL: {url}")
             
-            # Step 1: Fetch the full page content
-            print("  📄 Fetching full page content...")
-            page_content = self.fetch_artcall_page(url)
-            
             if not page_content or not page_content.get('full_description'):
                 print("  ⚠️  Could not fetch page content")
                 continue
@@ -226,55 +451,30 @@ Return JSON:
             desc_preview = page_content['full_description'][:150] + '...'
             print(f"  ✅ Found description: {desc_preview}")
             
-            # Step 2: Enrich with Haiku using the full content
-            print("  🤖 Enriching with AI...")
-            enriched = self.enrich_with_full_content(opp, page_content)
+            enriched = enrichments.get(opp['id'])
             
             if enriched:
-                # Prepare update data
-                update_data = {}
-                
-                # Update description with the longer version
                 if enriched.get('description'):
-                    update_data['description'] = enriched['description']
                     print(f"  ✅ Added full description ({len(enriched['description'])} chars)")
-                
-                # Update location
                 location = enriched.get('location', {})
                 if location.get('venue'):
                     print(f"  ✅ Venue: {location['venue']}")
                 if location.get('city') and location.get('state'):
-                    update_data['location_city'] = location['city']
-                    update_data['location_state'] = location['state']
-                    update_data['location_raw'] = f"{location['city']}, {location['state']}"
                     print(f"  ✅ Location: {location['city']}, {location['state']}")
-                
-                # Add the AI summary (store in a new field or append to description)
                 if enriched.get('summary'):
-                    # For now, prepend the summary to the description
-                    summary = enriched['summary']
-                    if 'description' in update_data:
-                        update_data['description'] = summary + "\n\n" + update_data['description']
-                    else:
-                        update_data['description'] = summary
                     print(f"  ✅ Added AI summary")
                 
-                # Update database
-                if update_data:
-                    try:
-                        self.supabase.table('opportunities').update(
-                            update_data
-                        ).eq('id', opp['id']).execute()
-                        
+                if opp['id'] in writes:
+                    error = writes[opp['id']].result()
+                    if error:
+                        print(f"  ❌ Database error: {error}")
+                    else:
                         success_count += 1
                         print(f"  ✅ Updated database successfully")
-                    except Exception as e:
-                        print(f"  ❌ Database error: {e}")
             else:
                 print("  ⚠️  Could not enrich")
             
             print()
-            time.sleep(1)  # Rate limiting
         
         print("="*60)
         print(f"✅ Successfully enriched {success_count}/{len(opportunities)} ArtCall opportunities")
@@ -285,8 +485,15 @@ Return JSON:
 
 def main():
     """Run ArtCall full enrichment."""
+    parser = argparse.ArgumentParser(description='Enrich ArtCall opportunities from their full pages')
+    parser.add_argument('--batch', action='store_true',
+                        help='Send Haiku requests as one Message Batches job (cheaper, slower)')
+    parser.add_argument('--all', action='store_true',
+                        help='Re-enrich opportunities already enriched by the current version')
+    args = parser.parse_args()
+    
     enricher = ArtCallFullEnricher()
-    enricher.process_artcall_opportunities(limit=5)  # Test with first 5
+    enricher.process_artcall_opportunities(limit=5, use_batch=args.batch, include_enriched=args.all)  # Test with first 5
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
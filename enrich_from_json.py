@@ -5,33 +5,72 @@ This bypasses the database sync issues and uses the raw scraped data.
 """
 
 import os
-import json
-import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import argparse
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils.json_io import iter_opportunities
+from utils.haiku import HAIKU_MODEL, HAIKU_WORKERS, RateLimiter, ResponseCache, complete, forced_tool, get_anthropic_client, prompt_blocks, truncate_tokens, run_message_batch
+
+# Static half of the location prompt; sent first so it can be prompt-cached
+LOCATION_INSTRUCTIONS = """Extract the physical location from the art opportunity below.
+
+The scraped location may be messy (e.g., "ExhibitionMiddletown Arts Center (MAC)36 Church StreetMiddletown").
+Extract the venue name, street address, city, and state.
+
+For "njws" in URL = New Jersey Watercolor Society = New Jersey location.
+
+Call return_location with the result. Set found to false if no location is found."""
+
+# Forcing this tool makes Haiku answer with a schema-shaped object instead of prose around JSON
+LOCATION_TOOL = {
+    "name": "return_location",
+    "description": "Record the physical location extracted for an art opportunity.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "found": {"type": "boolean", "description": "false if no location could be determined"},
+            "venue": {"type": "string", "description": "venue name"},
+            "address": {"type": "string", "description": "street address"},
+            "city": {"type": "string", "description": "city name"},
+            "state": {"type": "string", "description": "2-letter state code"},
+            "is_online": {"type": "boolean"},
+            "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        },
+        "required": ["found", "confidence"],
+    },
+}
+
+# Approximate token budget for the scraped description in the prompt
+DESCRIPTION_TOKEN_BUDGET = 120
+
+# ShowSubmit opportunities enriched per run while testing
+TEST_LIMIT = 10
+
+# Scraped fields the location prompt reads; everything else is dropped on load
+PROMPT_FIELDS = ('title', 'organization', 'location', 'url', 'description')
 
 load_dotenv()
 
 class DirectEnricher:
     def __init__(self):
         """Initialize with Supabase and Anthropic."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        self.supabase = get_client()
         
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
+        self.anthropic = get_anthropic_client()
+        self.rate_limiter = RateLimiter()
+        self.response_cache = ResponseCache()
     
-    def extract_location_with_haiku(self, opp: Dict) -> Optional[Dict]:
-        """Extract location using ALL available data from scraped JSON."""
+    def build_location_prompt(self, opp: Dict) -> str:
+        """Build the per-opportunity location details using ALL available data from scraped JSON."""
         
-        title = opp.get('title', '')
-        organization = opp.get('organization', '')
-        scraped_location = opp.get('location', '')  # The raw scraped location
-        url = opp.get('url', '')
-        description = opp.get('description', '')
+        title = opp['title']
+        organization = opp['organization']
+        scraped_location = opp['location']  # The raw scraped location
+        url = opp['url']
+        description = opp['description']
         
         # Extract URL hints
         url_hints = ""
@@ -39,79 +78,58 @@ class DirectEnricher:
             parts = url.split('/')[-1].split('-')
             url_hints = f"URL slug: {'-'.join(parts[:4])}"
         
-        prompt = f"""Extract the physical location from this art opportunity.
-
-Title: {title}
+        prompt = f"""Title: {title}
 Organization: {organization}
 Scraped Location Field: {scraped_location}
 URL: {url}
 {url_hints}
-Description: {description[:500] if description else 'None'}
-
-The scraped location may be messy (e.g., "ExhibitionMiddletown Arts Center (MAC)36 Church StreetMiddletown").
-Extract the venue name, street address, city, and state.
-
-For "njws" in URL = New Jersey Watercolor Society = New Jersey location.
-
-Return JSON:
-{{
-    "venue": "venue name",
-    "address": "street address",
-    "city": "city name",
-    "state": "2-letter state code",
-    "is_online": true/false,
-    "confidence": "high/medium/low"
-}}
-
-Return null if no location found."""
-
+Description: {truncate_tokens(description, DESCRIPTION_TOKEN_BUDGET) if description else 'None'}"""
+        return prompt
+    
+    def message_params(self, prompt: str) -> Dict:
+        """messages.create() parameters for a location prompt."""
+        return {
+            'model': HAIKU_MODEL,
+            'max_tokens': 500,
+            'temperature': 0,
+            'messages': [{"role": "user", "content": prompt_blocks(LOCATION_INSTRUCTIONS, prompt)}],
+            **forced_tool(LOCATION_TOOL),
+        }
+    
+    def parse_location_response(self, location_data: Optional[Dict]) -> Optional[Dict]:
+        """The return_location tool input, or None if Haiku found no location."""
+        if not location_data or not location_data.get('found'):
+            return None
+        return location_data
+    
+    def extract_location_with_haiku(self, opp: Dict) -> Optional[Dict]:
+        """Extract location using ALL available data from scraped JSON."""
         try:
-            response = self.anthropic.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=500,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            content = response.content[0].text.strip()
-            
-            # Debug: show what Haiku returned
-            # print(f"    Haiku response: {content[:100]}...")
-            
-            if content.lower() == 'null' or 'null' in content.lower()[:20]:
-                return None
-            
-            # Clean up response
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0]
-            elif '```' in content:
-                content = content.split('```')[1] if '```' in content else content
-            
-            # Remove any text before the JSON
-            if '{' in content:
-                content = content[content.index('{'):]
-            
-            # Remove any text after the JSON
-            if content.count('}') > 0:
-                # Find the last matching brace
-                brace_count = 0
-                for i, char in enumerate(content):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            content = content[:i+1]
-                            break
-            
-            return json.loads(content.strip())
+            location_data = complete(self.anthropic, self.message_params(self.build_location_prompt(opp)),
+                                     self.rate_limiter, self.response_cache)
+            return self.parse_location_response(location_data)
             
         except Exception as e:
             print(f"  ❌ Error: {e}")
             return None
     
-    def enrich_showsubmit(self):
-        """Enrich ShowSubmit opportunities using scraped JSON data."""
+    def extract_locations_batch(self, opps: List[Dict]) -> List[Optional[Dict]]:
+        """Extract locations for opps in one Message Batches job; results line up with opps."""
+        batch_requests = {
+            f"opp-{i}": self.message_params(self.build_location_prompt(opp))
+            for i, opp in enumerate(opps)
+        }
+        
+        results = run_message_batch(self.anthropic, batch_requests, cache=self.response_cache)
+        return [self.parse_location_response(location_data) for location_data in results.values()]
+    
+    def enrich_showsubmit(self, use_batch: bool = False):
+        """
+        Enrich ShowSubmit opportunities using scraped JSON data.
+        
+        With use_batch, all Haiku calls go out as one Message Batches job
+        (half price, no rate limiting) instead of rate-limited parallel calls.
+        """
         
         # Load the most recent scraped data
         json_files = sorted([f for f in os.listdir('data') if f.startswith('opportunities_')])
@@ -122,27 +140,37 @@ Return null if no location found."""
         latest_file = f"data/{json_files[-1]}"
         print(f"Loading {latest_file}")
         
-        with open(latest_file) as f:
-            data = json.load(f)
-        
-        # Get ALL ShowSubmit opportunities to enrich
+        # Stream the file and stop once the test batch is full, instead of
+        # loading every scraped opportunity
         showsubmit_opps = [
-            o for o in data 
-            if o.get('source_platform') == 'showsubmit'
+            {field: o.get(field) or '' for field in PROMPT_FIELDS}
+            for o in islice(
+                (o for o in iter_opportunities(latest_file) if o.get('source_platform') == 'showsubmit'),
+                TEST_LIMIT
+            )
         ]
         
         print(f"Found {len(showsubmit_opps)} ShowSubmit opportunities to enrich\n")
         
-        success_count = 0
+        # Resolve titles to ids once, instead of a lookup query per update
+        id_by_title = self.fetch_showsubmit_ids([opp['title'] for opp in showsubmit_opps])
+        updates = []
         
-        for i, opp in enumerate(showsubmit_opps[:10], 1):  # Test with first 10
-            title = opp.get('title', '')
-            scraped_location = opp.get('location', '')
+        if use_batch:
+            print("Extracting locations via Message Batches (this can take a few minutes)...\n")
+            locations = self.extract_locations_batch(showsubmit_opps)
+        else:
+            with ThreadPoolExecutor(max_workers=HAIKU_WORKERS) as executor:
+                locations = list(executor.map(self.extract_location_with_haiku, showsubmit_opps))
+        
+        for i, opp in enumerate(showsubmit_opps, 1):
+            title = opp['title']
+            scraped_location = opp['location']
             
             print(f"[{i}] {title[:50]}...")
             print(f"    Scraped location: '{scraped_location}'")
             
-            location_data = self.extract_location_with_haiku(opp)
+            location_data = locations[i - 1]
             
             if location_data and location_data.get('confidence') in ['high', 'medium']:
                 parts = []
@@ -156,62 +184,71 @@ Return null if no location found."""
                 new_location = ', '.join(parts) if parts else 'Online'
                 print(f"    ✅ Extracted: {new_location}")
                 
-                # Update in database
-                if self.update_database(title, location_data):
-                    success_count += 1
-                    print(f"    ✅ Updated database")
+                # Queue the database update
+                update_data = self.build_location_update(location_data)
+                if title not in id_by_title:
+                    print(f"    ⚠️  Not found in database")
+                elif update_data:
+                    updates.append({'id': id_by_title[title], **update_data})
             else:
                 print(f"    ❌ Could not extract")
             
             print()
-            time.sleep(0.5)  # Rate limiting
         
-        print(f"\n✅ Successfully enriched {success_count}/{len(showsubmit_opps[:10])} opportunities")
+        success_count = self.update_locations(updates)
+        print(f"\n✅ Successfully enriched {success_count}/{len(showsubmit_opps)} opportunities")
+    
+    def fetch_showsubmit_ids(self, titles: List[str]) -> Dict[str, str]:
+        """Map the given ShowSubmit titles to opportunity ids in one query."""
+        if not titles:
+            return {}
+        response = self.supabase.table('opportunities').select('id, title').eq(
+            'source_platform', 'showsubmit'
+        ).in_('title', titles).order('id').execute()
+        id_by_title = {}
+        for row in response.data:
+            id_by_title.setdefault(row['title'], row['id'])
+        return id_by_title
+    
+    def build_location_update(self, location_data: Dict) -> Dict:
+        """Location columns to write for an extracted location."""
+        update_data = {}
+        
+        if location_data.get('is_online'):
+            update_data['location_raw'] = 'Online'
+        else:
+            parts = []
+            if location_data.get('city'):
+                parts.append(location_data['city'])
+            if location_data.get('state'):
+                parts.append(location_data['state'])
+            
+            if parts:
+                update_data['location_raw'] = ', '.join(parts)
+                update_data['location_city'] = location_data.get('city')
+                update_data['location_state'] = location_data.get('state')
+        
+        return update_data
     
-    def update_database(self, title: str, location_data: Dict) -> bool:
-        """Update opportunity in database."""
+    def update_locations(self, updates: List[Dict]) -> int:
+        """Apply queued location updates in one round trip; returns rows updated."""
+        if not updates:
+            return 0
         try:
-            # Find the opportunity by title
-            response = self.supabase.table('opportunities').select('id').eq(
-                'title', title
-            ).eq('source_platform', 'showsubmit').execute()
-            
-            if not response.data:
-                return False
-            
-            opp_id = response.data[0]['id']
-            
-            # Build update data
-            update_data = {}
-            
-            if location_data.get('is_online'):
-                update_data['location_raw'] = 'Online'
-            else:
-                parts = []
-                if location_data.get('city'):
-                    parts.append(location_data['city'])
-                if location_data.get('state'):
-                    parts.append(location_data['state'])
-                
-                if parts:
-                    update_data['location_raw'] = ', '.join(parts)
-                    update_data['location_city'] = location_data.get('city')
-                    update_data['location_state'] = location_data.get('state')
-            
-            # Update
-            self.supabase.table('opportunities').update(
-                update_data
-            ).eq('id', opp_id).execute()
-            
-            return True
-            
+            # See update_opportunity_locations() in DATABASE_SETUP.md
+            return self.supabase.rpc('update_opportunity_locations', {'updates': updates}).execute().data or 0
         except Exception as e:
             print(f"      Database error: {e}")
-            return False
+            return 0
 
 def main():
+    parser = argparse.ArgumentParser(description='Enrich ShowSubmit locations from scraped JSON')
+    parser.add_argument('--batch', action='store_true',
+                        help='Send Haiku requests as one Message Batches job (cheaper, slower)')
+    args = parser.parse_args()
+    
     enricher = DirectEnricher()
-    enricher.enrich_showsubmit()
+    enricher.enrich_showsubmit(use_batch=args.batch)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
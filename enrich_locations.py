@@ -4,87 +4,111 @@ Enrich location data using Claude Haiku by extracting proper locations from desc
 Focuses on opportunities where location data is clearly wrong (e.g., "email" as location).
 """
 
-import os
-import json
-import time
-from typing import Dict, List, Optional
+import hashlib
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils.haiku import HAIKU_MODEL, HAIKU_WORKERS, RateLimiter, ResponseCache, complete, forced_tool, get_anthropic_client, prompt_blocks
+
+# Rows per problematic_opportunities() page
+PAGE_SIZE = 1000
+
+# Opportunities packed into each Haiku request, and output tokens allowed per opportunity
+LOCATIONS_PER_PROMPT = 8
+LOCATION_TOKENS_PER_OPP = 300
+
+# Location updates sent per bulk database write
+UPDATE_BATCH_SIZE = 100
+
+# Static half of the prompt; sent first so it can be prompt-cached
+LOCATION_INSTRUCTIONS = """Extract the physical location of each art opportunity below.
+
+Look for:
+- Street addresses (e.g., "620 Broad St.")
+- City names and states (e.g., "Shrewsbury, NJ")
+- Venue names (e.g., "Guild of Creative Art")
+- Delivery/shipping locations
+- Exhibition venues
+
+If location is genuinely online/virtual, set is_online=true.
+Call record_locations with one entry per opportunity; set found to false where no location is found."""
+
+# Forced tool call, so the batch comes back as schema-shaped entries instead of JSON in prose
+LOCATION_TOOL = {
+    "name": "record_locations",
+    "description": "Record the physical location extracted for each art opportunity, in order.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "locations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "found": {"type": "boolean", "description": "false if no location could be determined"},
+                        "venue": {"type": "string", "description": "venue or organization name"},
+                        "address": {"type": "string", "description": "street address if mentioned"},
+                        "city": {"type": "string", "description": "city name"},
+                        "state": {"type": "string", "description": "state abbreviation (2 letters)"},
+                        "country": {"type": "string", "description": "country if not USA"},
+                        "is_online": {"type": "boolean"},
+                        "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+                    },
+                    "required": ["found", "confidence"],
+                },
+            },
+        },
+        "required": ["locations"],
+    },
+}
 
 load_dotenv()
 
 class LocationEnricher:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         """Initialize enricher with Supabase and Anthropic clients."""
-        # Supabase setup
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        # Supabase setup (shared keep-alive client)
+        self.supabase = get_client()
         
         # Anthropic setup
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        if not anthropic_key:
-            raise ValueError("Please set ANTHROPIC_API_KEY in .env file")
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
-        
-    def get_problematic_opportunities(self, platform_filter: str = None) -> List[Dict]:
-        """Get opportunities with clearly wrong location data."""
-        print("🔍 Finding opportunities with problematic locations...")
-        
-        # Get opportunities, optionally filtered by platform
-        if platform_filter:
-            response = self.supabase.table('opportunities').select('*').eq(
-                'source_platform', platform_filter
-            ).execute()
-        else:
-            response = self.supabase.table('opportunities').select('*').execute()
-        opportunities = response.data
-        
-        problematic = []
-        
-        for opp in opportunities:
-            location = opp.get('location_raw') or ''
-            location = location.lower()
-            description = opp.get('description', '')
-            
-            # Identify clearly wrong locations
-            is_problematic = any([
-                location in ['email', 'email:', 'online', '', 'n/a', 'na', 'unknown'],
-                location.startswith('http'),
-                location.startswith('www'),
-                '@' in location,
-                len(location) < 3,
-            ])
-            
-            # For ShowSubmit, "Email" is the main issue (case-insensitive)
-            if opp.get('source_platform') == 'showsubmit' and 'email' in location:
-                is_problematic = True
-            
-            if is_problematic:
-                # For ShowSubmit with Email location, always process (we'll get description separately)
-                if opp.get('source_platform') == 'showsubmit' and location == 'email':
-                    problematic.append(opp)
-                # For others, only process if description likely contains location info
-                elif description and len(description) > 50:
-                    problematic.append(opp)
-        
-        print(f"📊 Found {len(problematic)} opportunities with problematic locations")
-        
-        # Group by source
-        by_source = {}
-        for opp in problematic:
-            source = opp.get('source_platform', 'unknown')
-            by_source[source] = by_source.get(source, 0) + 1
+        self.anthropic = get_anthropic_client()
+        self.rate_limiter = RateLimiter()
+        # Identical prompts on reruns are answered from disk
+        self.response_cache = ResponseCache() if use_cache else None
         
-        print("By source platform:")
-        for source, count in by_source.items():
-            print(f"  - {source}: {count}")
+    def iter_problematic_opportunities(self, platform_filter: str = None) -> Iterator[Dict]:
+        """
+        Yield opportunities with clearly wrong location data, one page at a time.
         
-        return problematic
+        Only the current page is held in memory, and callers can start work
+        before the last page has been fetched.
+        """
+        # Classification happens in Postgres; see problematic_opportunities() in DATABASE_SETUP.md
+        after_id = None
+        while True:
+            page = self.supabase.rpc('problematic_opportunities', {
+                'platform_filter': platform_filter,
+                'after_id': after_id,
+                'page_size': PAGE_SIZE,
+            }).execute().data
+            if not page:
+                return
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            after_id = page[-1]['id']
     
-    def extract_location_with_haiku(self, title: str, description: str, location_raw: str, organization: str = None, url: str = None) -> Optional[Dict]:
-        """Use Claude Haiku to extract proper location from description."""
+    def build_location_context(self, opp: Dict) -> str:
+        """Describe one opportunity for the location prompt."""
+        title = opp.get('title', '')
+        description = opp.get('description', '')
+        location_raw = opp.get('location_raw', '')
+        organization = opp.get('organization', '')
+        url = opp.get('url', '')
         
         # Extract clues from URL (e.g., njws = New Jersey Watercolor Society)
         url_hints = ""
@@ -98,79 +122,63 @@ class LocationEnricher:
         if not description or len(description) < 50:
             description = f"Organization: {organization}" if organization else "No description available"
         
-        prompt = f"""Extract the physical location from this art opportunity information.
-
-Title: {title}
+        return f"""Title: {title}
 Organization: {organization or 'Unknown'}
 Current Location Field: {location_raw}
 {url_hints}
-Description or Context: {description}
-
-Look for:
-- Street addresses (e.g., "620 Broad St.")
-- City names and states (e.g., "Shrewsbury, NJ")
-- Venue names (e.g., "Guild of Creative Art")
-- Delivery/shipping locations
-- Exhibition venues
-
-Return a JSON object with these fields (use null if not found):
-{{
-    "venue": "venue or organization name",
-    "address": "street address if mentioned",
-    "city": "city name",
-    "state": "state abbreviation (2 letters)",
-    "country": "country if not USA",
-    "is_online": true/false,
-    "confidence": "high/medium/low"
-}}
-
-If location is genuinely online/virtual, set is_online=true.
-If no location found, return null.
-Only return the JSON, no other text."""
+Description or Context: {description}"""
+    
+    def prompt_key(self, opp: Dict) -> bytes:
+        """Digest of the opportunity's prompt section; equal keys get the same answer."""
+        return hashlib.blake2b(self.build_location_context(opp).encode(), digest_size=16).digest()
+    
+    def extract_locations_batch(self, opps: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Use Claude Haiku to extract locations for several opportunities in one request.
+        
+        Results line up with opps; None where no confident location was found
+        or the response could not be parsed.
+        """
+        sections = '\n\n'.join(
+            f"Opportunity {i}:\n{self.build_location_context(opp)}" for i, opp in enumerate(opps, 1)
+        )
+        details = f"""There are {len(opps)} opportunities below. Record exactly {len(opps)} locations,
+one per opportunity in the same order.
 
+{sections}"""
+        
         try:
-            response = self.anthropic.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=500,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            # Parse JSON response
-            content = response.content[0].text.strip()
-            
-            # Handle null response
-            if content.lower() == 'null':
-                return None
-                
-            # Clean up response if needed
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            location_data = json.loads(content)
-            
-            # Validate response
-            if location_data and location_data.get('confidence') in ['high', 'medium']:
-                return location_data
-            
-            return None
+            locations = complete(self.anthropic, {
+                'model': HAIKU_MODEL,
+                'max_tokens': LOCATION_TOKENS_PER_OPP * len(opps),
+                'temperature': 0,
+                'messages': [{"role": "user", "content": prompt_blocks(LOCATION_INSTRUCTIONS, details)}],
+                **forced_tool(LOCATION_TOOL),
+            }, self.rate_limiter, self.response_cache)['locations']
+            if len(locations) != len(opps):
+                raise ValueError(f"expected {len(opps)} results, got {len(locations)}")
             
         except Exception as e:
-            print(f"  ❌ Error extracting location: {e}")
-            return None
+            print(f"  ❌ Error extracting locations: {e}")
+            return [None] * len(opps)
+        
+        # Validate response
+        return [
+            location_data if location_data.get('found') and location_data.get('confidence') in ['high', 'medium'] else None
+            for location_data in locations
+        ]
     
-    def update_opportunity_location(self, opp_id: str, location_data: Dict) -> bool:
-        """Update opportunity with enriched location data."""
+    def build_location_update(self, opp_id: str, location_data: Dict) -> Optional[Dict]:
+        """Row for update_opportunity_locations(), or None if there is no usable location."""
         
         # Build location string
         location_parts = []
         
         if location_data.get('is_online'):
             location_raw = "Online"
-            location_city = None
-            location_state = None
+            # '' rather than None: the bulk update keeps the old value for nulls
+            location_city = ''
+            location_state = ''
         else:
             if location_data.get('city'):
                 location_parts.append(location_data['city'])
@@ -182,103 +190,161 @@ Only return the JSON, no other text."""
             location_state = location_data.get('state')
         
         if not location_raw:
-            return False
+            return None
+        
+        update_data = {
+            'id': opp_id,
+            'location_raw': location_raw,
+            'location_city': location_city,
+            'location_state': location_state
+        }
         
-        # Update in database
+        if location_data.get('country') and location_data['country'] != 'USA':
+            update_data['location_country'] = location_data['country']
+        
+        return update_data
+    
+    def flush_updates(self, updates: List[Dict]) -> int:
+        """Write queued location updates in one round trip; returns rows updated."""
+        if not updates:
+            return 0
         try:
-            update_data = {
-                'location_raw': location_raw,
-                'location_city': location_city,
-                'location_state': location_state
-            }
-            
-            if location_data.get('country') and location_data['country'] != 'USA':
-                update_data['location_country'] = location_data['country']
-            
-            response = self.supabase.table('opportunities').update(
-                update_data
-            ).eq('id', opp_id).execute()
-            
-            return bool(response.data)
-            
+            # See update_opportunity_locations() in DATABASE_SETUP.md
+            return self.supabase.rpc('update_opportunity_locations', {'updates': updates}).execute().data or 0
         except Exception as e:
             print(f"  ❌ Error updating database: {e}")
-            return False
+            return 0
     
     def enrich_locations(self, limit: int = 50, platform: str = None):
         """Enrich location data for problematic opportunities."""
         
-        # Get problematic opportunities
-        opportunities = self.get_problematic_opportunities(platform_filter=platform)
-        
-        if not opportunities:
-            print("✅ No problematic locations found!")
-            return
+        print("🔍 Finding opportunities with problematic locations...")
+        opportunities = self.iter_problematic_opportunities(platform_filter=platform)
         
         # Limit for testing
         if limit:
-            opportunities = opportunities[:limit]
+            opportunities = islice(opportunities, limit)
             print(f"\n🎯 Processing first {limit} opportunities (testing mode)")
         
         print("\n" + "="*60)
         print("Starting enrichment with Claude Haiku...")
         print("="*60)
         
+        processed = 0
         enriched_count = 0
         failed_count = 0
+        pending_updates = []
+        by_source = Counter()
         
-        for i, opp in enumerate(opportunities, 1):
-            title = opp.get('title', '')
-            description = opp.get('description', '')
-            location_raw = opp.get('location_raw', '')
-            
-            print(f"\n[{i}/{len(opportunities)}] {title[:60]}...")
-            print(f"  Current location: '{location_raw}'")
-            
-            # Extract location with Haiku
-            organization = opp.get('organization', '')
-            url = opp.get('url', '')
-            location_data = self.extract_location_with_haiku(title, description, location_raw, organization, url)
-            
-            if location_data:
-                # Build readable location
-                if location_data.get('is_online'):
-                    new_location = "Online"
-                else:
-                    parts = []
-                    if location_data.get('city'):
-                        parts.append(location_data['city'])
-                    if location_data.get('state'):
-                        parts.append(location_data['state'])
-                    new_location = ', '.join(parts) if parts else "Unknown"
+        def flush():
+            nonlocal enriched_count, failed_count, pending_updates
+            written = self.flush_updates(pending_updates)
+            enriched_count += written
+            failed_count += len(pending_updates) - written
+            pending_updates = []
+        
+        def report(chunk: List[Dict], locations: List[Optional[Dict]]):
+            nonlocal processed, failed_count
+            by_source.update(opp.get('source_platform', 'unknown') for opp in chunk)
+            for opp, location_data in zip(chunk, locations):
+                processed += 1
+                title = opp.get('title', '')
+                location_raw = opp.get('location_raw', '')
                 
-                print(f"  ✅ Extracted: {new_location} (confidence: {location_data.get('confidence')})")
+                print(f"\n[{processed}] {title[:60]}...")
+                print(f"  Current location: '{location_raw}'")
                 
-                # Update database
-                if self.update_opportunity_location(opp['id'], location_data):
-                    print(f"  ✅ Updated in database")
-                    enriched_count += 1
+                if location_data:
+                    # Build readable location
+                    if location_data.get('is_online'):
+                        new_location = "Online"
+                    else:
+                        parts = []
+                        if location_data.get('city'):
+                            parts.append(location_data['city'])
+                        if location_data.get('state'):
+                            parts.append(location_data['state'])
+                        new_location = ', '.join(parts) if parts else "Unknown"
+                    
+                    print(f"  ✅ Extracted: {new_location} (confidence: {location_data.get('confidence')})")
+                    
+                    # Queue the database update; written UPDATE_BATCH_SIZE rows at a time
+                    update_data = self.build_location_update(opp['id'], location_data)
+                    if update_data:
+                        pending_updates.append(update_data)
+                        print(f"  📝 Queued database update")
+                        if len(pending_updates) >= UPDATE_BATCH_SIZE:
+                            flush()
+                    else:
+                        print(f"  ❌ No usable location to save")
+                        failed_count += 1
                 else:
-                    print(f"  ❌ Failed to update database")
+                    print(f"  ⚠️  Could not extract location")
                     failed_count += 1
-            else:
-                print(f"  ⚠️  Could not extract location")
-                failed_count += 1
-            
-            # Rate limiting for API
-            time.sleep(0.5)
+        
+        # Several opportunities per Haiku request, requests in parallel behind the
+        # shared rate limiter. Chunks are pulled from the page stream only as
+        # workers free up, and results are reported in order. Rows whose prompt
+        # matches one already sent share that answer instead of a new request.
+        sent = {}  # prompt key -> (future, index of the row in its request)
+        
+        def resolve(chunk: List[Dict], keys: List[bytes]):
+            locations = []
+            for key in keys:
+                future, index = sent[key]
+                locations.append(future.result()[index])
+            report(chunk, locations)
+        
+        with ThreadPoolExecutor(max_workers=HAIKU_WORKERS) as executor:
+            in_flight = deque()
+            while True:
+                chunk, keys, unique = [], [], {}
+                for opp in opportunities:
+                    key = self.prompt_key(opp)
+                    chunk.append(opp)
+                    keys.append(key)
+                    if key not in sent and key not in unique:
+                        unique[key] = opp
+                        if len(unique) == LOCATIONS_PER_PROMPT:
+                            break
+                if not chunk:
+                    break
+                if unique:
+                    future = executor.submit(self.extract_locations_batch, list(unique.values()))
+                    for index, key in enumerate(unique):
+                        sent[key] = (future, index)
+                in_flight.append((chunk, keys))
+                if len(in_flight) >= 2 * HAIKU_WORKERS:
+                    resolve(*in_flight.popleft())
+            while in_flight:
+                resolve(*in_flight.popleft())
+        
+        flush()
+        
+        if not processed:
+            print("✅ No problematic locations found!")
+            return
         
         # Summary
         print("\n" + "="*60)
         print("📊 ENRICHMENT SUMMARY")
         print("="*60)
+        print("By source platform:")
+        for source, count in by_source.most_common():
+            print(f"  - {source}: {count}")
         print(f"✅ Successfully enriched: {enriched_count}")
         print(f"❌ Failed: {failed_count}")
+        print(f"♻️  Duplicate prompts answered without a request: {processed - len(sent)}")
         print(f"📈 Success rate: {enriched_count/(enriched_count+failed_count)*100:.1f}%")
 
 def main():
     """Main function."""
-    enricher = LocationEnricher()
+    parser = argparse.ArgumentParser(description='Fix problematic locations with Claude Haiku')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached Haiku responses and call the API for every prompt')
+    args = parser.parse_args()
+    
+    enricher = LocationEnricher(use_cache=not args.no_cache)
     
     # Process all ShowSubmit opportunities with Email location issue
     print("🎯 Processing ALL ShowSubmit opportunities with 'Email' location issue\n")
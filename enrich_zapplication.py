@@ -4,28 +4,71 @@ Enrich Zapplication opportunities with AI-generated descriptions.
 Zapplication pages don't have good descriptions, so we generate them from the metadata.
 """
 
-import os
 import json
-import time
-from typing import Dict, Optional
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils.haiku import HAIKU_MODEL, HAIKU_WORKERS, RateLimiter, ResponseCache, complete, forced_tool, get_anthropic_client, prompt_blocks
+
+# Events packed into each Haiku request, and output tokens allowed per event
+DESCRIPTIONS_PER_PROMPT = 8
+DESCRIPTION_TOKENS_PER_OPP = 300
+
+# Description updates sent per bulk database write
+UPDATE_BATCH_SIZE = 100
+
+# Columns the description prompt and report read
+EVENT_COLUMNS = 'id, title, organization, location_raw, deadline_raw, fee_raw, url, extras'
+
+# Static half of the prompt; sent first so it can be prompt-cached
+DESCRIPTION_INSTRUCTIONS = """Create a compelling 3-sentence description for each art fair/festival opportunity below.
+
+For each event, write exactly 3 sentences that:
+1. Introduce the event and its significance/appeal to artists
+2. Mention the location, dates, and type of art/vendors accepted
+3. Include application deadline and fees
+
+Make it informative and actionable for artists deciding whether to apply. Focus on facts, not speculation.
+Call record_descriptions with the descriptions."""
+
+# Forced tool call; each description stays free text, but the batch arrives as a parsed list
+DESCRIPTION_TOOL = {
+    "name": "record_descriptions",
+    "description": "Record the description written for each event, in order.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "descriptions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["descriptions"],
+    },
+}
 
 load_dotenv()
 
+def _normalize_extras(extras) -> Dict:
+    """The extras column as a dict; it may come back as a JSON string."""
+    if isinstance(extras, dict):
+        return extras
+    try:
+        return json.loads(extras or '{}')
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
 class ZapplicationEnricher:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         """Initialize with Supabase and Anthropic."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        self.supabase = get_client()
         
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
+        self.anthropic = get_anthropic_client()
+        self.rate_limiter = RateLimiter()
+        # Identical prompts on reruns are answered from disk
+        self.response_cache = ResponseCache() if use_cache else None
     
-    def generate_description(self, opp: Dict) -> Optional[str]:
-        """Generate a 3-sentence description for a Zapplication opportunity."""
+    def build_event_details(self, opp: Dict) -> str:
+        """Describe one Zapplication event for the description prompt."""
         
         title = opp.get('title', '')
         organization = opp.get('organization', '')
@@ -35,57 +78,67 @@ class ZapplicationEnricher:
         url = opp.get('url', '')
         
         # Extract event dates and other info from extras
-        extras = opp.get('extras', {})
-        if isinstance(extras, str):
-            try:
-                extras = json.loads(extras)
-            except:
-                extras = {}
+        extras = _normalize_extras(opp.get('extras'))
         
         event_dates = extras.get('event_dates', '')
         app_fee = extras.get('application_fee', '')
         booth_fee = extras.get('booth_fee', '')
         
-        prompt = f"""Create a compelling 3-sentence description for this art fair/festival opportunity.
-
-Event Details:
-- Title: {title}
+        return f"""- Title: {title}
 - Organization: {organization}
 - Location: {location}
 - Event Dates: {event_dates}
 - Application Deadline: {deadline}
 - Application Fee: {app_fee or fee or 'Not specified'}
 - Booth Fee: {booth_fee or 'Not specified'}
-- URL: {url}
-
-Write exactly 3 sentences that:
-1. Introduce the event and its significance/appeal to artists
-2. Mention the location, dates, and type of art/vendors accepted
-3. Include application deadline and fees
+- URL: {url}"""
+    
+    def generate_descriptions_batch(self, opps: List[Dict]) -> List[Optional[str]]:
+        """Generate 3-sentence descriptions for several Zapplication opportunities in one request."""
+        
+        events = '\n\n'.join(
+            f"Event {i}:\n{self.build_event_details(opp)}" for i, opp in enumerate(opps, 1)
+        )
+        details = f"""{events}
 
-Make it informative and actionable for artists deciding whether to apply. Focus on facts, not speculation."""
+Record exactly {len(opps)} descriptions, one per event in the same order."""
 
         try:
-            response = self.anthropic.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=300,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            description = response.content[0].text.strip()
+            descriptions = complete(self.anthropic, {
+                'model': HAIKU_MODEL,
+                'max_tokens': DESCRIPTION_TOKENS_PER_OPP * len(opps),
+                'temperature': 0,
+                'messages': [{"role": "user", "content": prompt_blocks(DESCRIPTION_INSTRUCTIONS, details)}],
+                **forced_tool(DESCRIPTION_TOOL),
+            }, self.rate_limiter, self.response_cache)['descriptions']
+            if len(descriptions) != len(opps):
+                raise ValueError(f"expected {len(opps)} descriptions, got {len(descriptions)}")
             
+        except Exception as e:
+            print(f"    ❌ Error generating descriptions: {e}")
+            return [None] * len(opps)
+        
+        results = []
+        for description in descriptions:
+            description = description.strip() if isinstance(description, str) else ''
             # Ensure it's not too long
             if len(description) > 500:
                 # Take first 3 sentences
                 sentences = description.split('. ')
                 description = '. '.join(sentences[:3]) + '.'
-            
-            return description
-            
+            results.append(description or None)
+        return results
+    
+    def flush_updates(self, updates: List[Dict]) -> int:
+        """Write queued description updates in one round trip; returns rows updated."""
+        if not updates:
+            return 0
+        try:
+            # See update_opportunity_descriptions() in DATABASE_SETUP.md
+            return self.supabase.rpc('update_opportunity_descriptions', {'updates': updates}).execute().data or 0
         except Exception as e:
-            print(f"    ❌ Error generating description: {e}")
-            return None
+            print(f"  ❌ Database error: {e}")
+            return 0
     
     def enrich_zapplication_opportunities(self, limit: int = 20):
         """Enrich Zapplication opportunities with AI descriptions."""
@@ -94,7 +147,7 @@ Make it informative and actionable for artists deciding whether to apply. Focus
         print("="*60)
         
         # Get Zapplication opportunities without descriptions
-        response = self.supabase.table('opportunities').select('*').eq(
+        response = self.supabase.table('opportunities').select(EVENT_COLUMNS).eq(
             'source_platform', 'zapplication'
         ).eq('description', '').limit(limit).execute()
         
@@ -107,33 +160,40 @@ Make it informative and actionable for artists deciding whether to apply. Focus
         
         success_count = 0
         
-        for i, opp in enumerate(opportunities, 1):
+        # Several events per Haiku request, requests in parallel behind the shared rate limiter
+        print("🤖 Generating descriptions...\n")
+        chunks = [
+            opportunities[start:start + DESCRIPTIONS_PER_PROMPT]
+            for start in range(0, len(opportunities), DESCRIPTIONS_PER_PROMPT)
+        ]
+        with ThreadPoolExecutor(max_workers=HAIKU_WORKERS) as executor:
+            descriptions = [
+                description
+                for chunk_descriptions in executor.map(self.generate_descriptions_batch, chunks)
+                for description in chunk_descriptions
+            ]
+        
+        pending_updates = []
+        for i, (opp, description) in enumerate(zip(opportunities, descriptions), 1):
             title = opp.get('title', '')
             
             print(f"[{i}/{len(opportunities)}] {title[:50]}...")
             print(f"  Location: {opp.get('location_raw', 'Unknown')}")
             print(f"  Deadline: {opp.get('deadline_raw', 'Unknown')}")
             
-            # Generate AI description
-            print("  🤖 Generating description...")
-            description = self.generate_description(opp)
-            
             if description:
-                # Update database
-                try:
-                    self.supabase.table('opportunities').update({
-                        'description': description
-                    }).eq('id', opp['id']).execute()
-                    
-                    success_count += 1
-                    print(f"  ✅ Added description: \"{description[:100]}...\"")
-                except Exception as e:
-                    print(f"  ❌ Database error: {e}")
+                # Queue the database update; written UPDATE_BATCH_SIZE rows at a time
+                pending_updates.append({'id': opp['id'], 'description': description})
+                print(f"  ✅ Generated description: \"{description[:100]}...\"")
+                if len(pending_updates) >= UPDATE_BATCH_SIZE:
+                    success_count += self.flush_updates(pending_updates)
+                    pending_updates = []
             else:
                 print("  ⚠️  Could not generate description")
             
             print()
-            time.sleep(0.5)  # Rate limiting
+        
+        success_count += self.flush_updates(pending_updates)
         
         print("="*60)
         print(f"✅ Successfully enriched {success_count}/{len(opportunities)} Zapplication opportunities")
@@ -151,7 +211,12 @@ Make it informative and actionable for artists deciding whether to apply. Focus
 
 def main():
     """Run Zapplication enrichment."""
-    enricher = ZapplicationEnricher()
+    parser = argparse.ArgumentParser(description='Generate Zapplication descriptions with Claude Haiku')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached Haiku responses and call the API for every prompt')
+    args = parser.parse_args()
+    
+    enricher = ZapplicationEnricher(use_cache=not args.no_cache)
     enricher.enrich_zapplication_opportunities(limit=10)  # Start with 10
 
 if __name__ == "__main__":
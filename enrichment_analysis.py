@@ -4,27 +4,68 @@ Analyze enrichment quality with before/after comparison and add AI-generated sum
 Tests on a sample of 25 records across different platforms.
 """
 
-import os
-import json
-import time
+import argparse
 import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils import json_io
+from utils.haiku import HAIKU_MODEL, HAIKU_WORKERS, RateLimiter, ResponseCache, complete, forced_tool, get_anthropic_client, prompt_blocks
+
+# Static half of the prompt; sent first so it can be prompt-cached
+ANALYSIS_INSTRUCTIONS = """Analyze the art opportunity below and provide:
+1. Location extraction (venue, city, state)
+2. A 3-sentence summary for artists
+
+Make the summary informative and actionable for artists deciding whether to apply.
+Call record_analysis with the result."""
+
+# Forced tool call, so the analysis arrives as a parsed object instead of JSON in prose
+ANALYSIS_TOOL = {
+    "name": "record_analysis",
+    "description": "Record the location and summary extracted for an art opportunity.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "object",
+                "properties": {
+                    "venue": {"type": "string", "description": "venue name if found"},
+                    "city": {"type": "string", "description": "city name"},
+                    "state": {"type": "string", "description": "2-letter state code"},
+                    "country": {"type": "string", "description": "country if not USA"},
+                    "is_online": {"type": "boolean"},
+                },
+            },
+            "summary": {
+                "type": "string",
+                "description": "A 3-sentence summary that covers: (1) What this opportunity is and who it's for. (2) Key eligibility requirements, medium restrictions, or important details. (3) Deadline, fee, and any unique benefits or features.",
+            },
+            "keywords": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
+            "opportunity_type": {
+                "type": "string",
+                "enum": ["exhibition", "fair", "residency", "grant", "competition", "market", "online"],
+            },
+            "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        },
+        "required": ["location", "summary", "confidence"],
+    },
+}
 
 load_dotenv()
 
 class EnrichmentAnalyzer:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         """Initialize with Supabase and Anthropic."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        self.supabase = get_client()
         
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
+        self.anthropic = get_anthropic_client()
+        self.rate_limiter = RateLimiter()
+        # Identical prompts on reruns are answered from disk
+        self.response_cache = ResponseCache() if use_cache else None
     
     def get_sample_opportunities(self, sample_size: int = 25) -> List[Dict]:
         """Get a diverse sample of opportunities for testing."""
@@ -32,20 +73,20 @@ class EnrichmentAnalyzer:
         print("📊 Gathering sample opportunities...")
         
         # Get a mix from different platforms
-        samples = []
-        
         # Platforms to sample from
         platforms = ['showsubmit', 'cafe', 'zapplication', 'artwork_archive', 'artcall']
         
+        # 5 random rows from each platform in one round trip; see platform_sample() in DATABASE_SETUP.md
+        response = self.supabase.rpc('platform_sample', {
+            'platforms': platforms,
+            'per_platform': 5,
+        }).execute()
+        samples = response.data or []
+        
+        by_platform = Counter(opp.get('source_platform') for opp in samples)
         for platform in platforms:
-            # Get 5 from each platform
-            response = self.supabase.table('opportunities').select('*').eq(
-                'source_platform', platform
-            ).limit(5).execute()
-            
-            if response.data:
-                samples.extend(response.data)
-                print(f"  • {platform}: {len(response.data)} opportunities")
+            if by_platform[platform]:
+                print(f"  • {platform}: {by_platform[platform]} opportunities")
         
         # Shuffle and limit to sample_size
         random.shuffle(samples)
@@ -69,61 +110,23 @@ class EnrichmentAnalyzer:
         fee = opp.get('fee_raw', '')
         url = opp.get('url', '')
         
-        prompt = f"""Analyze this art opportunity and provide:
-1. Location extraction (venue, city, state)
-2. A 3-sentence summary for artists
-
-Opportunity Details:
+        details = f"""Opportunity Details:
 Title: {title}
 Organization: {organization}
 Location: {location_raw}
 Deadline: {deadline}
 Fee: {fee}
 URL: {url}
-Description: {description[:1000] if description else 'No description available'}
-
-Provide response as JSON:
-{{
-    "location": {{
-        "venue": "venue name if found",
-        "city": "city name",
-        "state": "2-letter state code",
-        "country": "country if not USA",
-        "is_online": true/false
-    }},
-    "summary": "A 3-sentence summary that covers: (1) What this opportunity is and who it's for. (2) Key eligibility requirements, medium restrictions, or important details. (3) Deadline, fee, and any unique benefits or features.",
-    "keywords": ["keyword1", "keyword2", "keyword3"],
-    "opportunity_type": "exhibition|fair|residency|grant|competition|market|online",
-    "confidence": "high|medium|low"
-}}
-
-Make the summary informative and actionable for artists deciding whether to apply."""
+Description: {description[:1000] if description else 'No description available'}"""
 
         try:
-            response = self.anthropic.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            content = response.content[0].text.strip()
-            
-            # Parse JSON response
-            if '{' in content:
-                content = content[content.index('{'):]
-                # Find matching closing brace
-                brace_count = 0
-                for i, char in enumerate(content):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            content = content[:i+1]
-                            break
-            
-            return json.loads(content)
+            return complete(self.anthropic, {
+                'model': HAIKU_MODEL,
+                'max_tokens': 800,
+                'temperature': 0,
+                'messages': [{"role": "user", "content": prompt_blocks(ANALYSIS_INSTRUCTIONS, details)}],
+                **forced_tool(ANALYSIS_TOOL),
+            }, self.rate_limiter, self.response_cache)
             
         except Exception as e:
             print(f"    ❌ Enrichment error: {e}")
@@ -183,47 +186,47 @@ Make the summary informative and actionable for artists deciding whether to appl
         # Get sample
         samples = self.get_sample_opportunities(25)
         
-        # Analyze each
+        # Enrich in parallel behind the shared rate limiter, reporting in order
+        # as results arrive and appending every analysis to the results file
+        print("\n🤖 Enriching samples...")
         results = []
-        
-        for i, opp in enumerate(samples, 1):
-            title = opp.get('title', '')[:50]
-            platform = opp.get('source_platform', '')
-            
-            print(f"\n[{i}/25] {title}...")
-            print(f"  Platform: {platform}")
-            print(f"  Before: {opp.get('location_raw', 'No location')}")
-            
-            # Enrich
-            enriched = self.enrich_opportunity(opp)
-            
-            if enriched:
-                location = enriched.get('location', {})
+        output_file = f"data/enrichment_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        with open(output_file, 'wb') as output, ThreadPoolExecutor(max_workers=HAIKU_WORKERS) as executor:
+            enrichments = executor.map(self.enrich_opportunity, samples)
+            for i, (opp, enriched) in enumerate(zip(samples, enrichments), 1):
+                title = opp.get('title', '')[:50]
+                platform = opp.get('source_platform', '')
                 
-                # Show location improvements
-                if location.get('city') or location.get('state'):
-                    loc_str = f"{location.get('city', '')}, {location.get('state', '')}"
-                    print(f"  ✅ After: {loc_str}")
-                    if location.get('venue'):
-                        print(f"     Venue: {location['venue']}")
+                print(f"\n[{i}/{len(samples)}] {title}...")
+                print(f"  Platform: {platform}")
+                print(f"  Before: {opp.get('location_raw', 'No location')}")
                 
-                # Show summary (truncated)
-                if enriched.get('summary'):
-                    summary = enriched['summary']
-                    print(f"  📝 Summary: {summary[:100]}...")
+                if enriched:
+                    location = enriched.get('location', {})
+                    
+                    # Show location improvements
+                    if location.get('city') or location.get('state'):
+                        loc_str = f"{location.get('city', '')}, {location.get('state', '')}"
+                        print(f"  ✅ After: {loc_str}")
+                        if location.get('venue'):
+                            print(f"     Venue: {location['venue']}")
+                    
+                    # Show summary (truncated)
+                    if enriched.get('summary'):
+                        summary = enriched['summary']
+                        print(f"  📝 Summary: {summary[:100]}...")
+                    
+                    # Keywords and type
+                    if enriched.get('keywords'):
+                        print(f"  🏷️  Keywords: {', '.join(enriched['keywords'])}")
+                    if enriched.get('opportunity_type'):
+                        print(f"  📂 Type: {enriched['opportunity_type']}")
                 
-                # Keywords and type
-                if enriched.get('keywords'):
-                    print(f"  🏷️  Keywords: {', '.join(enriched['keywords'])}")
-                if enriched.get('opportunity_type'):
-                    print(f"  📂 Type: {enriched['opportunity_type']}")
-            
-            # Analyze
-            analysis = self.analyze_enrichment(opp, enriched)
-            results.append(analysis)
-            
-            # Rate limiting
-            time.sleep(0.5)
+                # Analyze
+                analysis = self.analyze_enrichment(opp, enriched)
+                results.append(analysis)
+                output.write(json_io.dumps(analysis) + b'\n')
+                output.flush()
         
         # Summary statistics
         print("\n" + "="*70)
@@ -267,12 +270,7 @@ Make the summary informative and actionable for artists deciding whether to appl
             print(f"  • {r['title'][:40]}: {r['improvement_count']} improvements")
             print(f"    {', '.join(r['improvements'][:3])}")
         
-        # Save detailed results
-        output_file = f"data/enrichment_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        print(f"\n💾 Detailed results saved to: {output_file}")
+        print(f"\n💾 Detailed results saved to: {output_file} (one analysis per line)")
         
         # Show sample summaries
         print(f"\n📝 Sample AI-Generated Summaries:")
@@ -288,7 +286,12 @@ Make the summary informative and actionable for artists deciding whether to appl
 
 def main():
     """Run the enrichment analysis."""
-    analyzer = EnrichmentAnalyzer()
+    parser = argparse.ArgumentParser(description='Compare opportunities before and after Haiku enrichment')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached Haiku responses and call the API for every prompt')
+    args = parser.parse_args()
+    
+    analyzer = EnrichmentAnalyzer(use_cache=not args.no_cache)
     results = analyzer.run_analysis()
 
 if __name__ == "__main__":
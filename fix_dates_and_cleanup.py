@@ -3,20 +3,14 @@
 Fix date parsing issues and remove bad test data.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
-from datetime import datetime
-from dateutil import parser
-
-load_dotenv()
+from utils.supabase_client import get_client, fetch_all, update_deadlines
+from collections import Counter
+from utils.date_parser import parse_deadline, parse_iso
 
 def fix_dates_and_cleanup():
     """Fix Artwork Archive dates and remove test data."""
     
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = get_client()
     
     print("="*70)
     print("FIXING DATES AND CLEANING BAD DATA")
@@ -31,53 +25,46 @@ def fix_dates_and_cleanup():
         "JuBu December Test Event #4"
     ]
     
+    supabase.table('opportunities').delete().in_('title', bad_titles).execute()
     for title in bad_titles:
-        response = supabase.table('opportunities').delete().eq('title', title).execute()
         print(f"✅ Removed: {title}")
     
-    # Also remove any opportunities with deadlines after 2026
-    response = supabase.table('opportunities').select('id, title, deadline_parsed').execute()
-    removed_count = 0
+    # Also remove any opportunities with deadlines after 2026, filtered and
+    # deleted in Postgres; the deleted rows come back for the report
+    response = supabase.table('opportunities').delete().gte('deadline_parsed', '2027-01-01').execute()
     for opp in response.data:
-        if opp.get('deadline_parsed'):
-            try:
-                date = datetime.fromisoformat(opp['deadline_parsed'].replace('Z', '+00:00'))
-                if date.year > 2026:
-                    supabase.table('opportunities').delete().eq('id', opp['id']).execute()
-                    print(f"✅ Removed future date: {opp['title'][:50]} ({date.year})")
-                    removed_count += 1
-            except:
-                pass
+        print(f"✅ Removed future date: {opp['title'][:50]} ({opp['deadline_parsed'][:4]})")
     
-    print(f"Removed {removed_count} opportunities with dates after 2026")
+    print(f"Removed {len(response.data)} opportunities with dates after 2026")
     
     # 2. Fix Artwork Archive date parsing
     print("\n2. FIXING ARTWORK ARCHIVE DATE PARSING")
     print("-"*40)
     
     # Get all Artwork Archive opportunities without parsed dates
-    response = supabase.table('opportunities').select('*').eq('source_platform', 'artwork_archive').is_('deadline_parsed', 'null').execute()
+    opportunities = fetch_all(
+        supabase.table('opportunities').select('id, title, deadline_raw').eq(
+            'source_platform', 'artwork_archive'
+        ).is_('deadline_parsed', 'null').order('id')
+    )
     
-    print(f"Found {len(response.data)} Artwork Archive opportunities without parsed dates")
+    print(f"Found {len(opportunities)} Artwork Archive opportunities without parsed dates")
     
-    fixed_count = 0
+    updates = []
     failed_count = 0
     
-    for opp in response.data:
+    for opp in opportunities:
         raw_deadline = opp.get('deadline_raw', '')
         
         if raw_deadline:
             try:
                 # Parse the date
-                parsed_date = parser.parse(raw_deadline, fuzzy=False)
+                parsed_date = parse_deadline(raw_deadline)
                 
-                # Update the record
-                supabase.table('opportunities').update({
-                    'deadline_parsed': parsed_date.isoformat()
-                }).eq('id', opp['id']).execute()
+                # Queue the update; written in bulk below
+                updates.append({'id': opp['id'], 'deadline_parsed': parsed_date.isoformat()})
                 
-                fixed_count += 1
-                if fixed_count <= 5:  # Show first 5 examples
+                if len(updates) <= 5:  # Show first 5 examples
                     print(f"  Fixed: {opp['title'][:40]}... → {parsed_date.strftime('%Y-%m-%d')}")
                 
             except Exception as e:
@@ -85,6 +72,7 @@ def fix_dates_and_cleanup():
                 if failed_count <= 3:  # Show first 3 failures
                     print(f"  ❌ Failed to parse '{raw_deadline}' for {opp['title'][:30]}: {e}")
     
+    fixed_count = update_deadlines(updates)
     print(f"\n✅ Fixed {fixed_count} Artwork Archive dates")
     if failed_count > 0:
         print(f"⚠️  Failed to parse {failed_count} dates")
@@ -93,16 +81,21 @@ def fix_dates_and_cleanup():
     print("\n3. FINAL DATE RANGE")
     print("-"*40)
     
-    response = supabase.table('opportunities').select('title, deadline_parsed, source_platform').execute()
+    opportunities = fetch_all(
+        supabase.table('opportunities').select('id, title, deadline_parsed, source_platform').order('id')
+    )
     
     dates = []
-    for opp in response.data:
-        if opp.get('deadline_parsed'):
-            try:
-                date = datetime.fromisoformat(opp['deadline_parsed'].replace('Z', '+00:00'))
-                dates.append((date, opp['source_platform'], opp['title']))
-            except:
-                pass
+    for opp in opportunities:
+        deadline_parsed = opp.get('deadline_parsed')
+        # Stored timestamps start with the year; skip anything else without raising
+        if not deadline_parsed or not deadline_parsed[:4].isdigit():
+            continue
+        try:
+            date = parse_iso(deadline_parsed)
+        except (ValueError, TypeError):
+            continue
+        dates.append((date, opp['source_platform'], opp['title']))
     
     dates.sort()
     
@@ -112,10 +105,7 @@ def fix_dates_and_cleanup():
         print(f"Total opportunities with valid dates: {len(dates)}")
         
         # Count by year
-        year_counts = {}
-        for date, _, _ in dates:
-            year = date.year
-            year_counts[year] = year_counts.get(year, 0) + 1
+        year_counts = Counter(date.year for date, _, _ in dates)
         
         print("\nOpportunities by year:")
         for year in sorted(year_counts.keys()):
@@ -3,20 +3,15 @@
 Fix Zapplication date parsing and remove past events.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+from utils.supabase_client import get_client, delete_opportunities, fetch_all, update_deadlines
+from collections import Counter
 from datetime import datetime
-from dateutil import parser
-
-load_dotenv()
+from utils.date_parser import parse_deadline, parse_iso
 
 def fix_zapplication_dates():
     """Fix Zapplication dates and remove past events."""
     
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = get_client()
     
     print("="*70)
     print("FIXING ZAPPLICATION DATES")
@@ -28,37 +23,37 @@ def fix_zapplication_dates():
     print("\n1. PARSING UNPARSED ZAPPLICATION DATES")
     print("-"*40)
     
-    response = supabase.table('opportunities').select('*').eq('source_platform', 'zapplication').is_('deadline_parsed', 'null').execute()
+    opportunities = fetch_all(
+        supabase.table('opportunities').select('id, title, deadline_raw').eq(
+            'source_platform', 'zapplication'
+        ).is_('deadline_parsed', 'null').order('id')
+    )
     
-    print(f"Found {len(response.data)} Zapplication opportunities without parsed dates")
+    print(f"Found {len(opportunities)} Zapplication opportunities without parsed dates")
     
-    fixed_count = 0
+    updates = []
+    past_ids = []
     failed_count = 0
-    past_count = 0
     
-    for opp in response.data:
+    for opp in opportunities:
         raw_deadline = opp.get('deadline_raw', '')
         
         if raw_deadline:
             try:
                 # Parse the date
-                parsed_date = parser.parse(raw_deadline, fuzzy=False)
+                parsed_date = parse_deadline(raw_deadline)
                 
                 # Check if it's in the past
                 if parsed_date < today:
-                    # Delete past events
-                    supabase.table('opportunities').delete().eq('id', opp['id']).execute()
-                    past_count += 1
-                    if past_count <= 5:
+                    # Queue past events for deletion
+                    past_ids.append(opp['id'])
+                    if len(past_ids) <= 5:
                         print(f"  🗑️  Removed past event: {opp['title'][:40]}... ({parsed_date.strftime('%Y-%m-%d')})")
                 else:
-                    # Update with parsed date
-                    supabase.table('opportunities').update({
-                        'deadline_parsed': parsed_date.isoformat()
-                    }).eq('id', opp['id']).execute()
+                    # Queue the parsed date
+                    updates.append({'id': opp['id'], 'deadline_parsed': parsed_date.isoformat()})
                     
-                    fixed_count += 1
-                    if fixed_count <= 5:
+                    if len(updates) <= 5:
                         print(f"  ✅ Fixed: {opp['title'][:40]}... → {parsed_date.strftime('%Y-%m-%d')}")
                 
             except Exception as e:
@@ -66,6 +61,10 @@ def fix_zapplication_dates():
                 if failed_count <= 3:
                     print(f"  ❌ Failed to parse '{raw_deadline}': {e}")
     
+    # Bulk writes instead of one request per row
+    past_count = delete_opportunities(past_ids)
+    fixed_count = update_deadlines(updates)
+    
     print(f"\n✅ Fixed {fixed_count} future Zapplication dates")
     print(f"🗑️  Removed {past_count} past events")
     if failed_count > 0:
@@ -75,30 +74,28 @@ def fix_zapplication_dates():
     print("\n2. CHECKING ALREADY-PARSED DATES FOR PAST EVENTS")
     print("-"*40)
     
-    response = supabase.table('opportunities').select('*').eq('source_platform', 'zapplication').not_.is_('deadline_parsed', 'null').execute()
+    # Filtered and deleted in Postgres; the deleted rows come back for the report
+    response = supabase.table('opportunities').delete().eq(
+        'source_platform', 'zapplication'
+    ).lt('deadline_parsed', today.isoformat()).execute()
     
-    removed_past = 0
-    for opp in response.data:
-        try:
-            parsed_date = datetime.fromisoformat(opp['deadline_parsed'].replace('Z', '+00:00'))
-            if parsed_date < today:
-                supabase.table('opportunities').delete().eq('id', opp['id']).execute()
-                removed_past += 1
-                if removed_past <= 5:
-                    print(f"  🗑️  Removed: {opp['title'][:40]}... ({parsed_date.strftime('%Y-%m-%d')})")
-        except:
-            pass
+    for opp in response.data[:5]:
+        print(f"  🗑️  Removed: {opp['title'][:40]}... ({opp['deadline_parsed'][:10]})")
     
-    print(f"🗑️  Removed {removed_past} past events with parsed dates")
+    print(f"🗑️  Removed {len(response.data)} past events with parsed dates")
     
     # 3. Final statistics
     print("\n3. FINAL STATISTICS")
     print("-"*40)
     
-    response = supabase.table('opportunities').select('title, deadline_parsed').eq('source_platform', 'zapplication').execute()
+    opportunities = fetch_all(
+        supabase.table('opportunities').select('id, deadline_parsed').eq(
+            'source_platform', 'zapplication'
+        ).order('id')
+    )
     
-    total = len(response.data)
-    with_dates = sum(1 for o in response.data if o.get('deadline_parsed'))
+    total = len(opportunities)
+    with_dates = sum(1 for o in opportunities if o.get('deadline_parsed'))
     
     print(f"Total Zapplication opportunities: {total}")
     print(f"With parsed dates: {with_dates}")
@@ -106,23 +103,23 @@ def fix_zapplication_dates():
     
     # Get date range
     dates = []
-    for opp in response.data:
-        if opp.get('deadline_parsed'):
-            try:
-                date = datetime.fromisoformat(opp['deadline_parsed'].replace('Z', '+00:00'))
-                dates.append(date)
-            except:
-                pass
+    for opp in opportunities:
+        deadline_parsed = opp.get('deadline_parsed')
+        # Stored timestamps start with the year; skip anything else without raising
+        if not deadline_parsed or not deadline_parsed[:4].isdigit():
+            continue
+        try:
+            date = parse_iso(deadline_parsed)
+        except (ValueError, TypeError):
+            continue
+        dates.append(date)
     
     if dates:
         dates.sort()
         print(f"\nDate range: {dates[0].strftime('%Y-%m-%d')} to {dates[-1].strftime('%Y-%m-%d')}")
         
         # Count by month
-        month_counts = {}
-        for date in dates:
-            month_key = f"{date.year}-{date.month:02d}"
-            month_counts[month_key] = month_counts.get(month_key, 0) + 1
+        month_counts = Counter(f"{date.year}-{date.month:02d}" for date in dates)
         
         print("\nOpportunities by month:")
         for month in sorted(month_counts.keys())[:10]:
@@ -4,73 +4,151 @@ Main orchestrator for art opportunity scrapers.
 Fetches opportunities from all platforms and combines them.
 """
 
-import json
+import atexit
 import logging
+import queue
+import re
 import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Dict, List, Any
 import hashlib
 
+# rapidfuzz catches near-duplicate titles ("Artist" vs "Artists"); without it
+# only titles that normalize identically are merged
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
 # Add the current directory to path to import scrapers
 sys.path.insert(0, str(Path(__file__).parent))
 
 from scrapers import SCRAPERS
+from utils import json_io
+
+# One shared string object per platform name, used as source_platform on every record
+PLATFORMS = {name: sys.intern(name) for name in SCRAPERS}
 
-# Configure logging
+# Configure logging. Records are formatted and queued on the calling thread,
+# then written to the console and log file by a background listener, so
+# logging in the scrape loops doesn't block on I/O. The file is only opened
+# on the first write.
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(f'scraper_{datetime.now().strftime("%Y%m%d")}.log')
-    ]
+    handlers=[QueueHandler(_log_queue)]
+)
+_log_listener = QueueListener(
+    _log_queue,
+    logging.StreamHandler(),
+    logging.FileHandler(f'scraper_{datetime.now().strftime("%Y%m%d")}.log', delay=True),
+    respect_handler_level=True
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
+# data_quality stat name -> opportunity field it checks
+QUALITY_FIELDS = {
+    'with_deadline': 'deadline',
+    'with_organization': 'organization',
+    'with_location': 'location',
+    'with_fee': 'fee',
+}
+
+# Minimum rapidfuzz ratio (0-100) for two normalized titles to count as the same opportunity
+FUZZY_TITLE_THRESHOLD = 95
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+_DIGITS_RE = re.compile(r'\d+')
+
+def _title_key(title: str) -> str:
+    """Lowercase title with punctuation and repeated whitespace collapsed."""
+    return _NON_ALNUM_RE.sub(' ', title.lower()).strip()
+
+def _similar_key(key: str, blocks: Dict) -> str:
+    """
+    An already-seen title key close enough to `key`, or `key` itself.
+    
+    Keys are only compared within a block sharing the first word and all
+    numbers, so "Show 2024" never merges with "Show 2025" and the number
+    of comparisons stays small.
+    """
+    block = blocks[(key.split(' ', 1)[0], tuple(_DIGITS_RE.findall(key)))]
+    match = process.extractOne(key, block, scorer=fuzz.ratio, score_cutoff=FUZZY_TITLE_THRESHOLD)
+    if match:
+        return match[0]
+    block.append(key)
+    return key
+
 class OpportunityAggregator:
     """Aggregates opportunities from all platforms and handles deduplication."""
     
     def __init__(self):
         self.opportunities = []
         self.duplicates = []
+        # Per-platform and data-quality counts, tallied by deduplicate()
+        self.platform_counts = None
+        self.quality_counts = None
         
     def add_opportunities(self, opportunities: List[Dict], platform: str):
         """Add opportunities from a platform to the collection."""
         logger.info(f"Adding {len(opportunities)} opportunities from {platform}")
         
+        platform = PLATFORMS.get(platform) or sys.intern(platform)
         for opp in opportunities:
             opp['source_platform'] = platform
+            # Normalized once here; deduplicate() reads it, save_results() strips it
+            opp['_title_key'] = _title_key(opp.get('title') or '')
             self.opportunities.append(opp)
+        self.platform_counts = self.quality_counts = None
     
     def deduplicate(self):
         """Remove duplicate opportunities across platforms."""
-        seen_titles = {}
-        unique_opportunities = []
-        
+        # Group by normalized title in one pass, then merge only the groups
+        # that actually have duplicates
+        groups = {}
+        blocks = defaultdict(list)
         for opp in self.opportunities:
-            # Create a normalized title for comparison
-            normalized_title = opp['title'].lower().strip()
-            
-            # Check for similar titles (simple approach)
-            if normalized_title in seen_titles:
+            key = opp.get('_title_key')
+            if key is None:
+                key = _title_key(opp['title'])
+            # Exact matches are the common case; only new keys get a fuzzy lookup
+            if key not in groups and RAPIDFUZZ_AVAILABLE:
+                key = _similar_key(key, blocks)
+            groups.setdefault(key, []).append(opp)
+        
+        unique_opportunities = []
+        platform_counts = Counter()
+        quality_counts = dict.fromkeys(QUALITY_FIELDS, 0)
+        for group in groups.values():
+            existing = group[0]
+            for opp in group[1:]:
                 # Mark as duplicate and merge data
-                existing = seen_titles[normalized_title]
                 self.duplicates.append({
                     'title': opp['title'],
                     'platforms': [existing['source_platform'], opp['source_platform']]
                 })
                 
                 # Merge data (prefer non-empty fields)
-                for key, value in opp.items():
-                    if value and not existing.get(key):
-                        existing[key] = value
-            else:
-                seen_titles[normalized_title] = opp
-                unique_opportunities.append(opp)
+                existing |= {key: value for key, value in opp.items() if value and not existing.get(key)}
+            unique_opportunities.append(existing)
+            
+            # Tally statistics on the merged record while it's at hand
+            platform_counts[existing.get('source_platform', 'unknown')] += 1
+            for stat, field in QUALITY_FIELDS.items():
+                quality_counts[stat] += bool(existing.get(field))
         
         self.opportunities = unique_opportunities
+        self.platform_counts = platform_counts
+        self.quality_counts = quality_counts
         
         if self.duplicates:
             logger.info(f"Found {len(self.duplicates)} duplicate opportunities")
@@ -82,59 +160,58 @@ class OpportunityAggregator:
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save main opportunities file
+        # Save main opportunities file, streamed record by record and with
+        # the dedup helper key dropped on the way out
         main_file = output_path / f"opportunities_{timestamp}.json"
-        with open(main_file, 'w') as f:
-            json.dump(self.opportunities, f, indent=2, default=str)
+        saved = json_io.save_json_array(
+            main_file,
+            ({key: value for key, value in opp.items() if key != '_title_key'} for opp in self.opportunities)
+        )
         
-        logger.info(f"Saved {len(self.opportunities)} opportunities to {main_file}")
+        logger.info(f"Saved {saved} opportunities to {main_file}")
         
         # Save duplicates report if any
         if self.duplicates:
             dup_file = output_path / f"duplicates_{timestamp}.json"
-            with open(dup_file, 'w') as f:
-                json.dump(self.duplicates, f, indent=2)
+            json_io.save_json(dup_file, self.duplicates)
             logger.info(f"Saved duplicates report to {dup_file}")
         
         # Save summary statistics
         stats = self.get_statistics()
         stats_file = output_path / f"stats_{timestamp}.json"
-        with open(stats_file, 'w') as f:
-            json.dump(stats, f, indent=2)
+        json_io.save_json(stats_file, stats)
         
         return main_file
     
     def get_statistics(self) -> Dict:
         """Generate statistics about the scraped data."""
-        stats = {
+        if self.platform_counts is None:
+            # Not deduplicated yet; count the collection as it stands
+            self.platform_counts = Counter(opp.get('source_platform', 'unknown') for opp in self.opportunities)
+            self.quality_counts = {
+                stat: sum(1 for opp in self.opportunities if opp.get(field))
+                for stat, field in QUALITY_FIELDS.items()
+            }
+        
+        return {
             'total_opportunities': len(self.opportunities),
             'duplicates_found': len(self.duplicates),
             'scraped_at': datetime.now().isoformat(),
-            'by_platform': {},
-            'data_quality': {
-                'with_deadline': 0,
-                'with_organization': 0,
-                'with_location': 0,
-                'with_fee': 0
-            }
+            'by_platform': dict(self.platform_counts),
+            'data_quality': dict(self.quality_counts),
         }
-        
-        # Count by platform
-        for opp in self.opportunities:
-            platform = opp.get('source_platform', 'unknown')
-            stats['by_platform'][platform] = stats['by_platform'].get(platform, 0) + 1
-            
-            # Check data quality
-            if opp.get('deadline'):
-                stats['data_quality']['with_deadline'] += 1
-            if opp.get('organization'):
-                stats['data_quality']['with_organization'] += 1
-            if opp.get('location'):
-                stats['data_quality']['with_location'] += 1
-            if opp.get('fee'):
-                stats['data_quality']['with_fee'] += 1
-        
-        return stats
+
+def _run_scraper(platform: str, zap_limit: int = None) -> List[Dict]:
+    """Run one platform's scraper and return its opportunities."""
+    logger.info(f"\nScraping {platform}...")
+    
+    scraper_class = SCRAPERS[platform]
+    # Special handling for Zapplication with limit
+    if platform == 'zapplication' and zap_limit is not None:
+        scraper = scraper_class(max_events_limit=zap_limit)
+    else:
+        scraper = scraper_class()
+    return scraper.run()
 
 def main(platforms: List[str] = None, zap_limit: int = None):
     """
@@ -156,34 +233,37 @@ def main(platforms: List[str] = None, zap_limit: int = None):
     successful_platforms = []
     failed_platforms = []
     
-    # Run each scraper
+    known_platforms = []
     for platform in platforms:
         if platform not in SCRAPERS:
             logger.warning(f"Unknown platform: {platform}")
             continue
+        known_platforms.append(platform)
+    
+    # Scrapers are network-bound and independent, so run them all at once.
+    # Results are added in platform order, which deduplicate() relies on to
+    # decide which copy of a duplicate is kept.
+    with ThreadPoolExecutor(max_workers=max(len(known_platforms), 1)) as executor:
+        futures = {
+            platform: executor.submit(_run_scraper, platform, zap_limit)
+            for platform in known_platforms
+        }
         
-        logger.info(f"\nScraping {platform}...")
-        
-        try:
-            scraper_class = SCRAPERS[platform]
-            # Special handling for Zapplication with limit
-            if platform == 'zapplication' and zap_limit is not None:
-                scraper = scraper_class(max_events_limit=zap_limit)
-            else:
-                scraper = scraper_class()
-            opportunities = scraper.run()
-            
-            if opportunities:
-                aggregator.add_opportunities(opportunities, platform)
-                successful_platforms.append(platform)
-                logger.info(f"✓ {platform}: {len(opportunities)} opportunities")
-            else:
-                logger.warning(f"✗ {platform}: No opportunities found")
-                failed_platforms.append(platform)
+        for platform, future in futures.items():
+            try:
+                opportunities = future.result()
                 
-        except Exception as e:
-            logger.error(f"✗ {platform}: Failed with error: {e}")
-            failed_platforms.append(platform)
+                if opportunities:
+                    aggregator.add_opportunities(opportunities, platform)
+                    successful_platforms.append(platform)
+                    logger.info(f"✓ {platform}: {len(opportunities)} opportunities")
+                else:
+                    logger.warning(f"✗ {platform}: No opportunities found")
+                    failed_platforms.append(platform)
+                    
+            except Exception as e:
+                logger.error(f"✗ {platform}: Failed with error: {e}")
+                failed_platforms.append(platform)
     
     # Process results
     if aggregator.opportunities:
@@ -4,24 +4,37 @@ Phase 2: Enrichment - Fetches descriptions for opportunities that need them.
 This can run slowly in the background.
 """
 
-import json
+import hashlib
 import logging
 import sys
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent))
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database import OpportunityDatabase
-from scrapers.cafe_direct import CafeDirectScraper
-from scrapers.artcall_enhanced import ArtCallEnhancedScraper
-from scrapers.artwork_archive_enhanced import ArtworkArchiveEnhancedScraper
+# Detail-page scrapers; without them CAFE, ArtCall and Artwork Archive
+# listings pass through phase 2 with only location enrichment
+try:
+    from scrapers.cafe_direct import CafeDirectScraper
+    from scrapers.artcall_enhanced import ArtCallEnhancedScraper
+    from scrapers.artwork_archive_enhanced import ArtworkArchiveEnhancedScraper
+    DETAIL_SCRAPERS_AVAILABLE = True
+except ImportError:
+    DETAIL_SCRAPERS_AVAILABLE = False
 from scrapers.showsubmit import ShowSubmitScraper
 from scrapers.zapplication import ZapplicationScraper
-from utils.location_enricher import enrich_location, format_location_display
+from scrapers.base import RATE_LIMITER
+from utils.location_enricher import batch_enrich_locations, format_location_display
+from utils.rate_limit import DEFAULT_MAX_PER_SECOND
+from utils import json_io
+from utils.json_io import iter_opportunities
 
 # Configure logging
 logging.basicConfig(
@@ -30,22 +43,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent detail-page fetches per batch, by platform; others use the batch size.
+# Artwork Archive throttles much sooner than ArtCall
+PLATFORM_WORKERS = {
+    'artcall': 8,
+    'artwork_archive': 3,
+}
+
+# Opportunities written to the database by earlier runs, one {"id", "url_hash"}
+# JSON object per line; a changed URL gets enriched again
+ENRICHED_CACHE_FILE = Path("data/.enriched_cache.jsonl")
+
+# Descriptions at or below this length don't count as enriched
+MIN_DESCRIPTION_LENGTH = 50
+
+# Rows per update_opportunity_enrichment() call
+UPDATE_BATCH_SIZE = 500
+
+# Concurrent per-row database updates when a batch fails; kept small to stay
+# within Supabase's connection pool
+DB_WORKERS = 16
+
 class OpportunityEnricher:
     """Enriches opportunities with descriptions and additional details."""
     
-    def __init__(self, batch_size: int = 10, delay_between_batches: float = 5.0):
+    def __init__(self, batch_size: int = 10, delay_between_batches: float = 5.0, use_cache: bool = True):
         self.db = OpportunityDatabase()
         self.batch_size = batch_size
         self.delay_between_batches = delay_between_batches
+        # Skip opportunities already enriched and saved by an earlier run
+        self.use_cache = use_cache
+        # Platform threads share the output file; batches are written whole
+        self.output_lock = threading.Lock()
         
         # Initialize scrapers
         self.scrapers = {
-            'cafe': CafeDirectScraper(),
-            'artcall': ArtCallEnhancedScraper(),
-            'artwork_archive': ArtworkArchiveEnhancedScraper(),
             'showsubmit': ShowSubmitScraper(),
             'zapplication': ZapplicationScraper()
         }
+        if DETAIL_SCRAPERS_AVAILABLE:
+            self.scrapers.update({
+                'cafe': CafeDirectScraper(),
+                'artcall': ArtCallEnhancedScraper(),
+                'artwork_archive': ArtworkArchiveEnhancedScraper(),
+            })
+        else:
+            logger.warning("Detail-page scrapers not installed; ArtCall and Artwork Archive descriptions won't be fetched")
         
         # Configure rate limiting
         if 'artcall' in self.scrapers:
@@ -67,7 +110,9 @@ class OpportunityEnricher:
     
     def enrich_artcall_opportunity(self, opp: Dict) -> Dict:
         """Enrich an ArtCall opportunity with description."""
-        scraper = self.scrapers['artcall']
+        scraper = self.scrapers.get('artcall')
+        if scraper is None:
+            return opp
         
         try:
             # Extract detail page
@@ -97,7 +142,9 @@ class OpportunityEnricher:
     
     def enrich_artwork_archive_opportunity(self, opp: Dict) -> Dict:
         """Enrich an Artwork Archive opportunity with description."""
-        scraper = self.scrapers['artwork_archive']
+        scraper = self.scrapers.get('artwork_archive')
+        if scraper is None:
+            return opp
         
         try:
             # Extract detail page
@@ -138,7 +185,12 @@ class OpportunityEnricher:
         return opp
     
     def enrich_opportunity(self, opp: Dict) -> Dict:
-        """Enrich a single opportunity based on its platform."""
+        """
+        Enrich a single opportunity based on its platform.
+        
+        Location enrichment is applied afterwards, a batch at a time, by
+        enrich_platform().
+        """
         platform = opp.get('source_platform', '')
         
         enrichers = {
@@ -155,10 +207,10 @@ class OpportunityEnricher:
         else:
             logger.warning(f"  Unknown platform: {platform}")
         
-        # Apply location enrichment to all opportunities
-        opp = enrich_location(opp, extract_from_description=True)
-        
-        # Log location status
+        return opp
+    
+    def log_location(self, opp: Dict):
+        """Log the outcome of location enrichment for an opportunity."""
         if 'extras' in opp and 'location_metadata' in opp['extras']:
             meta = opp['extras']['location_metadata']
             if meta['enriched'] == 'Not Specified':
@@ -167,50 +219,155 @@ class OpportunityEnricher:
                 logger.info(f"    📍 Location: {meta['enriched']} (uncertain)")
             else:
                 logger.info(f"    📍 Location: {meta['enriched']}")
-        
-        return opp
     
-    def enrich_from_file(self, json_file: str, limit: int = None) -> List[Dict]:
-        """Enrich opportunities from a JSON file."""
-        # Load opportunities
-        with open(json_file, 'r') as f:
-            opportunities = json.load(f)
+    def cache_key(self, opp: Dict) -> Tuple[str, str]:
+        """Enriched-cache key: the opportunity id and a hash of its URL."""
+        url_hash = hashlib.blake2b((opp.get('url') or '').encode('utf-8'), digest_size=8).hexdigest()
+        return opp.get('id'), url_hash
+    
+    def load_enriched_cache(self) -> Set[Tuple[str, str]]:
+        """Keys of opportunities enriched and saved by earlier runs."""
+        if not ENRICHED_CACHE_FILE.exists():
+            return set()
+        return {(entry['id'], entry['url_hash']) for entry in iter_opportunities(ENRICHED_CACHE_FILE)}
+    
+    def record_enriched(self, opportunities: List[Dict]):
+        """Append opportunities with a real description to the enriched cache."""
+        lines = []
+        for opp in opportunities:
+            if opp.get('needs_enrichment') is False and len(opp.get('description') or '') > MIN_DESCRIPTION_LENGTH:
+                opp_id, url_hash = self.cache_key(opp)
+                lines.append(json_io.dumps({'id': opp_id, 'url_hash': url_hash}) + b'\n')
+        if lines:
+            ENRICHED_CACHE_FILE.parent.mkdir(exist_ok=True)
+            with open(ENRICHED_CACHE_FILE, 'ab') as f:
+                f.write(b''.join(lines))
+    
+    def enrich_from_file(self, json_file: str, limit: int = None, output=None) -> List[Dict]:
+        """
+        Enrich opportunities from a JSON or JSONL file.
+        
+        If output (a binary file) is given, each enriched opportunity is
+        written to it as a JSON line as soon as its batch finishes.
+        """
+        # Load opportunities, leaving out those earlier runs already enriched
+        enriched_keys = self.load_enriched_cache() if self.use_cache else set()
+        opportunities = []
+        skipped = 0
+        for opp in iter_opportunities(json_file):
+            if enriched_keys and self.cache_key(opp) in enriched_keys:
+                skipped += 1
+                continue
+            opportunities.append(opp)
+            if limit and len(opportunities) >= limit:
+                break
         
-        if limit:
-            opportunities = opportunities[:limit]
+        if skipped:
+            logger.info(f"Skipped {skipped} opportunities already enriched by earlier runs")
         
         logger.info(f"Loaded {len(opportunities)} opportunities to enrich")
         
-        # Group by platform for efficient processing
-        by_platform = {}
+        # Group by platform for efficient processing. A listing that appears
+        # more than once is only fetched once; its copies are filled in below.
+        by_platform = defaultdict(list)
+        digests_by_platform = defaultdict(list)
+        seen = set()
+        copies = []
         for opp in opportunities:
+            digest = self.content_digest(opp)
+            if digest in seen:
+                copies.append((digest, opp))
+                continue
+            seen.add(digest)
+            
             platform = opp.get('source_platform', 'unknown')
-            if platform not in by_platform:
-                by_platform[platform] = []
             by_platform[platform].append(opp)
+            digests_by_platform[platform].append(digest)
+        
+        # Platforms don't share a host, so each runs its own batch loop
+        # alongside the others; a slow site no longer holds up a fast one.
+        # Results are collected in platform order.
+        with ThreadPoolExecutor(max_workers=max(len(by_platform), 1)) as executor:
+            futures = {
+                platform: executor.submit(self.enrich_platform, platform, platform_opps, output)
+                for platform, platform_opps in by_platform.items()
+            }
+            enriched = []
+            enriched_by_digest = {}
+            for platform, future in futures.items():
+                results = future.result()
+                enriched.extend(results)
+                enriched_by_digest.update(zip(digests_by_platform[platform], results))
+        
+        if copies:
+            logger.info(f"Copying enrichment to {len(copies)} duplicate listings")
+            # A copy keeps its own identity, which may be on another platform
+            copied = [
+                {**enriched_by_digest[digest],
+                 'id': opp.get('id'), 'url': opp.get('url'), 'source_platform': opp.get('source_platform')}
+                for digest, opp in copies
+            ]
+            enriched.extend(copied)
+            if output is not None:
+                self.write_output(output, copied)
+        
+        return enriched
+    
+    def content_digest(self, opp: Dict) -> bytes:
+        """
+        Digest of a listing's normalized title and source URL; equal digests
+        are the same listing.
+        
+        The listing's own url differs on every platform, so it is only used
+        when there is no original_source_url to match copies across platforms.
+        """
+        source_url = opp.get('original_source_url') or opp.get('url') or ''
+        key = '\n'.join(((opp.get('title') or '').strip(), source_url)).lower()
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    
+    def write_output(self, output, opportunities: List[Dict]):
+        """Append opportunities to the output file as JSON lines."""
+        lines = b''.join(json_io.dumps(opp) + b'\n' for opp in opportunities)
+        with self.output_lock:
+            output.write(lines)
+            output.flush()
+    
+    def enrich_platform(self, platform: str, platform_opps: List[Dict], output=None) -> List[Dict]:
+        """Enrich one platform's opportunities in rate-limited batches."""
+        logger.info(f"\nEnriching {len(platform_opps)} {platform} opportunities...")
+        workers = PLATFORM_WORKERS.get(platform, self.batch_size)
         
-        # Process each platform
         enriched = []
-        for platform, platform_opps in by_platform.items():
-            logger.info(f"\nEnriching {len(platform_opps)} {platform} opportunities...")
+        # Process in batches
+        for i in range(0, len(platform_opps), self.batch_size):
+            batch = platform_opps[i:i+self.batch_size]
+            batch_num = i // self.batch_size + 1
+            total_batches = (len(platform_opps) + self.batch_size - 1) // self.batch_size
             
-            # Process in batches
-            for i in range(0, len(platform_opps), self.batch_size):
-                batch = platform_opps[i:i+self.batch_size]
-                batch_num = i // self.batch_size + 1
-                total_batches = (len(platform_opps) + self.batch_size - 1) // self.batch_size
-                
-                logger.info(f"  Batch {batch_num}/{total_batches} ({len(batch)} items)")
-                
-                for j, opp in enumerate(batch, 1):
-                    logger.info(f"  [{i+j}/{len(platform_opps)}] {opp['title'][:50]}...")
-                    enriched_opp = self.enrich_opportunity(opp)
-                    enriched.append(enriched_opp)
-                
-                # Delay between batches to avoid rate limiting
-                if i + self.batch_size < len(platform_opps):
-                    logger.info(f"  Waiting {self.delay_between_batches}s before next batch...")
-                    time.sleep(self.delay_between_batches)
+            logger.info(f"  {platform} batch {batch_num}/{total_batches} ({len(batch)} items)")
+            
+            for j, opp in enumerate(batch, 1):
+                logger.info(f"  [{i+j}/{len(platform_opps)}] {opp['title'][:50]}...")
+            
+            # Detail-page fetches are network-bound, so the batch is fetched
+            # concurrently; map() keeps results in batch order
+            with ThreadPoolExecutor(max_workers=min(workers, len(batch))) as executor:
+                batch_enriched = list(executor.map(self.enrich_opportunity, batch))
+            
+            # Location enrichment is CPU-only, so it runs once over the whole
+            # batch, where repeated location strings are only parsed once
+            batch_enriched, _ = batch_enrich_locations(batch_enriched)
+            for opp in batch_enriched:
+                self.log_location(opp)
+            enriched.extend(batch_enriched)
+            
+            if output is not None:
+                self.write_output(output, batch_enriched)
+            
+            # Delay between batches to avoid rate limiting
+            if i + self.batch_size < len(platform_opps):
+                logger.info(f"  Waiting {self.delay_between_batches}s before next {platform} batch...")
+                time.sleep(self.delay_between_batches)
         
         return enriched
     
@@ -218,22 +375,49 @@ class OpportunityEnricher:
         """Update database with enriched opportunities."""
         logger.info("\nUpdating database with enriched data...")
         
-        success_count = 0
-        error_count = 0
-        
-        for opp in opportunities:
+        def update_one(opp: Dict) -> bool:
             try:
                 # Update the opportunity in database
-                result = self.db.client.table('opportunities').update({
+                self.db.client.table('opportunities').update({
                     'description': opp.get('description'),
                     'extras': opp,  # Store all enriched data in extras
                     'updated_at': datetime.now().isoformat()
                 }).eq('id', opp['id']).execute()
-                
-                success_count += 1
+                return True
             except Exception as e:
                 logger.error(f"Failed to update {opp['id']}: {e}")
-                error_count += 1
+                return False
+        
+        success_count = 0
+        error_count = 0
+        saved = []
+        for start in range(0, len(opportunities), UPDATE_BATCH_SIZE):
+            chunk = opportunities[start:start + UPDATE_BATCH_SIZE]
+            try:
+                # One UPDATE per chunk; see update_opportunity_enrichment() in DATABASE_SETUP.md
+                rows = self.db.client.rpc('update_opportunity_enrichment', {'updates': [
+                    {'id': opp['id'], 'description': opp.get('description'), 'extras': opp}
+                    for opp in chunk
+                ]}).execute().data or []
+                # Only the ids the UPDATE returned were written
+                updated_ids = {str(row['id']) for row in rows}
+                updated = [opp for opp in chunk if str(opp['id']) in updated_ids]
+                success_count += len(updated)
+                error_count += len(chunk) - len(updated)
+                saved.extend(updated)
+            except Exception as e:
+                # Fall back to per-row updates so one bad row doesn't sink the chunk
+                logger.warning(f"Batch update failed ({e}); retrying {len(chunk)} rows individually")
+                with ThreadPoolExecutor(max_workers=DB_WORKERS) as executor:
+                    results = list(executor.map(update_one, chunk))
+                success_count += sum(results)
+                error_count += len(results) - sum(results)
+                saved.extend(opp for opp, ok in zip(chunk, results) if ok)
+        
+        # Only rows that reached the database are cached, so an interrupted
+        # run never leaves an opportunity marked done but unsaved
+        if self.use_cache:
+            self.record_enriched(saved)
         
         logger.info(f"✓ Updated {success_count} opportunities")
         if error_count > 0:
@@ -250,24 +434,23 @@ class OpportunityEnricher:
         if not input_file:
             # Look for most recent phase1_new file
             data_dir = Path("data")
-            new_files = sorted(data_dir.glob("phase1_new_*.json"))
-            if new_files:
-                input_file = str(new_files[-1])
+            # Names carry the run timestamp, so the greatest name is the newest
+            newest = max(data_dir.glob("phase1_new_*.json"), default=None)
+            if newest:
+                input_file = str(newest)
                 logger.info(f"Using most recent new opportunities file: {input_file}")
             else:
                 logger.error("No phase1_new files found. Run phase1_fast_scrape.py first.")
                 return False
         
-        # Enrich opportunities
-        enriched = self.enrich_from_file(input_file, limit=limit)
-        
-        # Save enriched data
+        # Enrich opportunities, saving each batch as JSON lines as it finishes
+        # so an interrupted run keeps what it already fetched
         output_dir = Path("data")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = output_dir / f"phase2_enriched_{timestamp}.json"
+        output_file = output_dir / f"phase2_enriched_{timestamp}.jsonl"
         
-        with open(output_file, 'w') as f:
-            json.dump(enriched, f, indent=2, default=str)
+        with open(output_file, 'wb') as output:
+            enriched = self.enrich_from_file(input_file, limit=limit, output=output)
         
         # Update database
         self.update_database(enriched)
@@ -278,7 +461,7 @@ class OpportunityEnricher:
         logger.info("="*70)
         
         with_desc = sum(1 for o in enriched 
-                       if o.get('description') and len(o.get('description', '')) > 50)
+                       if o.get('description') and len(o.get('description', '')) > MIN_DESCRIPTION_LENGTH)
         logger.info(f"Total enriched: {len(enriched)}")
         logger.info(f"With descriptions: {with_desc}/{len(enriched)}")
         logger.info(f"Saved to: {output_file}")
@@ -289,13 +472,18 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Phase 2: Enrich opportunities with descriptions")
-    parser.add_argument('--input', help='Input JSON file with opportunities to enrich')
+    parser.add_argument('--input', help='Input JSON or JSONL file with opportunities to enrich')
     parser.add_argument('--limit', type=int, help='Limit number to enrich (for testing)')
     parser.add_argument('--batch-size', type=int, default=10, help='Batch size for processing')
+    parser.add_argument('--max-per-second', type=float, default=DEFAULT_MAX_PER_SECOND,
+                        help='Detail-page requests per second allowed to each site')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-enrich opportunities already enriched by an earlier run')
     
     args = parser.parse_args()
     
-    enricher = OpportunityEnricher(batch_size=args.batch_size)
+    RATE_LIMITER.max_per_second = args.max_per_second
+    enricher = OpportunityEnricher(batch_size=args.batch_size, use_cache=not args.refresh)
     success = enricher.run(input_file=args.input, limit=args.limit)
     
     if success:
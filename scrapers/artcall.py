@@ -3,9 +3,29 @@ ArtCall.org scraper for art opportunities.
 """
 
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+from bs4 import SoupStrainer
 from .base import BaseScraper
 
+# selectolax (Lexbor) parses and matches CSS selectors in C; bs4 is the fallback
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+_ENTRY_FEE_RE = re.compile('Entry Fee:')
+
+# Everything the list page parse reads is inside the call rows
+_CALL_ROWS = SoupStrainer('div', class_='row mb-5')
+
+def _next_text(node) -> str:
+    """Text immediately following a selectolax node, e.g. the value after a label span."""
+    sibling = node.next
+    if sibling is None or sibling.tag != '-text':
+        return ''
+    return sibling.text()
+
 class ArtCallScraper(BaseScraper):
     """Scraper for ArtCall.org opportunities."""
     
@@ -17,10 +37,94 @@ class ArtCallScraper(BaseScraper):
         """Fetch all active calls from ArtCall.org."""
         opportunities = []
         
-        soup = self.get_soup(f"{self.base_url}/calls")
-        if not soup:
-            return opportunities
+        url = f"{self.base_url}/calls"
+        if SELECTOLAX_AVAILABLE:
+            html = self.get_html(url)
+            if not html:
+                return opportunities
+            call_rows = self.parse_rows_fast(html)
+        else:
+            soup = self.get_soup(url, parse_only=_CALL_ROWS)
+            if not soup:
+                return opportunities
+            call_rows = self.parse_rows_soup(soup)
+        
+        for row in call_rows:
+            call_url = row['url']
+            if not call_url.startswith('http'):
+                call_url = self.base_url + call_url
+            
+            # Extract organization from subdomain
+            org_name = ''
+            if '//' in call_url:
+                subdomain = call_url.split('//')[1].split('.')[0]
+                if subdomain != 'www':
+                    org_name = subdomain.replace('-', ' ').title()
+            
+            opportunity = {
+                'id': self.generate_id(call_url),
+                'title': row['title'],
+                'organization': org_name,
+                'url': call_url,
+                'deadline': row['deadline'],
+                'location': row['location'],
+                'fee': row['fee'],
+                'description': '',
+                
+                # Extra fields
+                'eligibility': row['eligibility']
+            }
             
+            opportunities.append(opportunity)
+                
+        return opportunities
+    
+    def parse_rows_fast(self, html: bytes) -> Iterator[Dict[str, str]]:
+        """Yield the raw fields of each call row, parsed with selectolax."""
+        tree = HTMLParser(html)
+        
+        # Same rows as bs4's class_='row mb-5', which matches the exact class string
+        for row in tree.css('div[class="row mb-5"]'):
+            try:
+                # Extract title and URL
+                heading = row.css_first('h3')
+                title_link = heading.css_first('a') if heading else None
+                if not title_link:
+                    continue
+                
+                fields = {
+                    'url': title_link.attributes.get('href') or '',
+                    'title': title_link.text().strip(),
+                    'deadline': '',
+                    'fee': '',
+                    'location': '',
+                    'eligibility': '',
+                }
+                
+                for label in row.css('span.h6'):
+                    label_text = label.text()
+                    if label_text == 'Entry Deadline:':
+                        fields['deadline'] = _next_text(label).strip().replace('\u202f', ' ')
+                    elif label_text == 'Eligibility:':
+                        fields['eligibility'] = _next_text(label).strip()
+                
+                for span in row.css('span'):
+                    if _ENTRY_FEE_RE.search(span.text()):
+                        fields['fee'] = ' '.join(_next_text(span).split())
+                        break
+                
+                badge_span = row.css_first('span[class="badge bg-info"]')
+                if badge_span:
+                    fields['location'] = badge_span.text().strip()
+                
+                yield fields
+                
+            except Exception as e:
+                self.logger.warning(f"Error parsing ArtCall row: {e}")
+                continue
+    
+    def parse_rows_soup(self, soup) -> Iterator[Dict[str, str]]:
+        """Yield the raw fields of each call row, parsed with BeautifulSoup."""
         # Find all call containers
         call_rows = soup.find_all('div', class_='row mb-5')
         
@@ -34,9 +138,6 @@ class ArtCallScraper(BaseScraper):
                     continue
                 
                 call_url = title_link.get('href', '')
-                if not call_url.startswith('http'):
-                    call_url = self.base_url + call_url
-                    
                 call_title = title_link.text.strip()
                 
                 # Extract deadline
@@ -47,7 +148,7 @@ class ArtCallScraper(BaseScraper):
                 
                 # Extract fee
                 fee_text = ''
-                fee_span = row.find('span', string=re.compile('Entry Fee:'))
+                fee_span = row.find('span', string=_ENTRY_FEE_RE)
                 if fee_span and fee_span.next_sibling:
                     fee_text = ' '.join(fee_span.next_sibling.strip().split())
                 
@@ -63,31 +164,15 @@ class ArtCallScraper(BaseScraper):
                 if elig_span and elig_span.next_sibling:
                     eligibility = elig_span.next_sibling.strip()
                 
-                # Extract organization from subdomain
-                org_name = ''
-                if '//' in call_url:
-                    subdomain = call_url.split('//')[1].split('.')[0]
-                    if subdomain != 'www':
-                        org_name = subdomain.replace('-', ' ').title()
-                
-                opportunity = {
-                    'id': self.generate_id(call_url),
-                    'title': call_title,
-                    'organization': org_name,
+                yield {
                     'url': call_url,
+                    'title': call_title,
                     'deadline': deadline_text,
-                    'location': location,
                     'fee': fee_text,
-                    'description': '',
-                    
-                    # Extra fields
-                    'eligibility': eligibility
+                    'location': location,
+                    'eligibility': eligibility,
                 }
                 
-                opportunities.append(opportunity)
-                
             except Exception as e:
                 self.logger.warning(f"Error parsing ArtCall row: {e}")
                 continue
-                
-        return opportunities
\ No newline at end of file
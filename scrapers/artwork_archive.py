@@ -3,10 +3,35 @@ ArtworkArchive.com scraper for art opportunities.
 """
 
 import re
-import time
 from typing import List, Dict, Any, Optional
 from .base import BaseScraper
 
+# Compiled once; these run for every container and detail page
+_APPLY_RE = re.compile('Apply', re.I)
+_LOCATION_RE = re.compile('Location')
+_FEE_RE = re.compile('Fee')
+_CAMEL_RE = re.compile(r'([a-z])([A-Z])')
+# Patterns like "by Organization Name" in detail page text
+_ORG_PATTERNS = [
+    re.compile(r'(?:by|from|presented by)\s+([A-Z][^,\n]{2,50})', re.I),
+    re.compile(r'Organization:\s*([^,\n]+)', re.I),
+]
+
+# Characters of detail page text searched for an organization; the
+# "presented by" line sits near the top of the listing
+ORG_TEXT_LIMIT = 8192
+
+def _leading_text(soup, limit: int) -> str:
+    """The first `limit` characters of soup.get_text(), without joining the rest of the page."""
+    parts = []
+    size = 0
+    for text in soup.strings:
+        parts.append(text)
+        size += len(text)
+        if size >= limit:
+            break
+    return ''.join(parts)[:limit]
+
 class ArtworkArchiveScraper(BaseScraper):
     """Scraper for ArtworkArchive.com opportunities."""
     
@@ -25,7 +50,7 @@ class ArtworkArchiveScraper(BaseScraper):
                 return detail_data
             
             # Look for Apply button which often has the original source
-            apply_button = soup.find('a', string=re.compile('Apply', re.I))
+            apply_button = soup.find('a', string=_APPLY_RE)
             if apply_button:
                 apply_url = apply_button.get('href', '')
                 if apply_url and apply_url.startswith('http'):
@@ -51,20 +76,14 @@ class ArtworkArchiveScraper(BaseScraper):
                         if org_name and org_name.lower() not in ['www', 'w']:
                             org_name = org_name.replace('-', ' ').replace('_', ' ')
                             # Handle camelCase
-                            org_name = re.sub(r'([a-z])([A-Z])', r'\1 \2', org_name)
+                            org_name = _CAMEL_RE.sub(r'\1 \2', org_name)
                             detail_data['organization'] = org_name.title()
             
             # Also try to find organization in the page content
             if 'organization' not in detail_data:
-                # Look for patterns like "by Organization Name"
-                org_patterns = [
-                    r'(?:by|from|presented by)\s+([A-Z][^,\n]{2,50})',
-                    r'Organization:\s*([^,\n]+)',
-                ]
-                
-                page_text = soup.get_text()
-                for pattern in org_patterns:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
+                page_text = _leading_text(soup, ORG_TEXT_LIMIT)
+                for pattern in _ORG_PATTERNS:
+                    match = pattern.search(page_text)
                     if match:
                         detail_data['organization'] = match.group(1).strip()
                         break
@@ -145,7 +164,7 @@ class ArtworkArchiveScraper(BaseScraper):
                         
                         # Extract location
                         location = ''
-                        location_elem = container.find('span', string=re.compile('Location'))
+                        location_elem = container.find('span', string=_LOCATION_RE)
                         if location_elem:
                             if location_elem.next_sibling:
                                 location = str(location_elem.next_sibling).strip()
@@ -155,7 +174,7 @@ class ArtworkArchiveScraper(BaseScraper):
                         
                         # Extract fee
                         fee = ''
-                        fee_elem = container.find('span', string=re.compile('Fee'))
+                        fee_elem = container.find('span', string=_FEE_RE)
                         if fee_elem:
                             if fee_elem.next_sibling:
                                 fee = str(fee_elem.next_sibling).strip()
@@ -186,7 +205,6 @@ class ArtworkArchiveScraper(BaseScraper):
                         # Fetch detail page if enabled and URL exists
                         if self.fetch_details and call_url:
                             self.logger.debug(f"Fetching details for: {title}")
-                            time.sleep(0.3)  # Be polite
                             detail_data = self.fetch_detail_page(call_url)
                             
                             # Update with detail data
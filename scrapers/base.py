@@ -3,27 +3,69 @@ Base scraper class with shared functionality for all art call platforms.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime
 import hashlib
 import json
 import logging
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Any
 from abc import ABC, abstractmethod
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.fee_normalizer import normalize_fee
+from utils.rate_limit import HostRateLimiter
+
+# lxml is a much faster tree builder than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Keep-alive pool for the shared session: one pool per host, each holding
+# enough connections for concurrent detail-page fetches
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 64
+
+# Transient failures retried by the session itself, with 0.5s, 1s, 2s backoff
+RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+
+# Paces page requests per site across every scraper and thread
+RATE_LIMITER = HostRateLimiter()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide HTTP session, creating it on first use.
+    
+    Every scraper shares it, so connections (and TLS handshakes) to a site
+    are reused across pages and across scrapers running in parallel.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+            })
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+    return _session
 
 class BaseScraper(ABC):
     """Base class for all art opportunity scrapers."""
     
     def __init__(self, platform_name: str):
         self.platform_name = platform_name
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.session = get_session()
         self.logger = logging.getLogger(self.__class__.__name__)
         
     @abstractmethod
@@ -72,16 +114,29 @@ class BaseScraper(ABC):
         self.logger.info(f"Saved {len(opportunities)} opportunities to {filename}")
         return filename
     
-    def get_soup(self, url: str) -> Optional[BeautifulSoup]:
-        """Get BeautifulSoup object from URL."""
+    def get_html(self, url: str) -> Optional[bytes]:
+        """Get the raw page body from URL."""
         try:
+            RATE_LIMITER.acquire(url)
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            return response.content
         except Exception as e:
             self.logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def get_soup(self, url: str, parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        """
+        Get BeautifulSoup object from URL.
+        
+        With parse_only, only the matching elements (and their contents)
+        are built into the tree.
+        """
+        html = self.get_html(url)
+        if html is None:
+            return None
+        return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+    
     def run(self) -> List[Dict[str, Any]]:
         """Main execution method."""
         self.logger.info(f"Starting {self.platform_name} scraper...")
@@ -3,7 +3,6 @@ ShowSubmit.com scraper for art opportunities.
 """
 
 import re
-import time
 from typing import List, Dict, Any
 from datetime import datetime
 from .base import BaseScraper
@@ -211,7 +210,6 @@ class ShowSubmitScraper(BaseScraper):
                 # Fetch detail page for complete data
                 if url:
                     self.logger.debug(f"Fetching details for: {title}")
-                    time.sleep(0.3)  # Be polite to the server
                     detail_data = self.fetch_detail_page(url)
                     
                     # Update with detail data (overwrites basic data if found)
@@ -12,20 +12,17 @@ import time
 from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import anthropic
+from utils.supabase_client import get_client
+from utils.haiku import get_anthropic_client
 
 load_dotenv()
 
 class SmartEnricher:
     def __init__(self):
         """Initialize with Supabase and Anthropic."""
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase = create_client(supabase_url, supabase_key)
+        self.supabase = get_client()
         
-        anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        self.anthropic = anthropic.Anthropic(api_key=anthropic_key)
+        self.anthropic = get_anthropic_client()
         
         # Track enrichment history
         self.enrichment_log_file = 'data/enrichment_log.json'
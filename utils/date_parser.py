@@ -0,0 +1,60 @@
+"""
+Deadline date parsing utility.
+Tries the fixed formats the scrapers actually emit before falling back to dateutil.
+"""
+
+from datetime import datetime
+
+from dateutil import parser
+
+# ciso8601 parses ISO 8601 timestamps in C, several times faster than fromisoformat
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+# Shapes seen in deadline_raw: Zapplication and Artwork Archive write "Month DD, YYYY",
+# CaFE writes YYYY-MM-DD
+DEADLINE_FORMATS = (
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%B %d %Y",
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d %B %Y",
+)
+
+
+def _looks_like_date(text: str) -> bool:
+    """Whether text could be a date at all: at least 4 characters and some digits."""
+    return len(text) >= 4 and any(c.isdigit() for c in text)
+
+
+def parse_deadline(deadline_raw: str) -> datetime:
+    """
+    Parse a raw deadline string into a datetime.
+
+    Each DEADLINE_FORMATS entry is tried with strptime first, which is much
+    cheaper than dateutil's token-based parser; anything else goes to
+    dateutil.parser.parse (non-fuzzy), whose errors propagate to the caller.
+    Blank and digit-free text ("TBD", "Rolling") raises ValueError without
+    reaching either.
+    """
+    text = deadline_raw.strip()
+    if not _looks_like_date(text):
+        raise ValueError(f"Not a date: {deadline_raw!r}")
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return parser.parse(text, fuzzy=False)
+
+
+def parse_iso(timestamp: str) -> datetime:
+    """Parse a stored ISO 8601 timestamp such as deadline_parsed (a trailing Z is fine)."""
+    if CISO8601_AVAILABLE:
+        return ciso8601.parse_datetime(timestamp)
+    return datetime.fromisoformat(timestamp)
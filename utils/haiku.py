@@ -0,0 +1,351 @@
+"""
+Shared helpers for calling Claude Haiku from the enrichment scripts.
+"""
+
+import os
+import time
+import hashlib
+import random
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import anthropic
+from dotenv import load_dotenv
+
+from utils import json_io
+
+HAIKU_MODEL = "claude-3-haiku-20240307"
+
+# Default plan limits for Haiku; the limiter keeps us under them
+HAIKU_REQUESTS_PER_MINUTE = 50
+HAIKU_INPUT_TOKENS_PER_MINUTE = 50000
+HAIKU_OUTPUT_TOKENS_PER_MINUTE = 10000
+
+# Below these remaining-quota levels (from the anthropic-ratelimit-* response
+# headers) every worker waits for the reported reset
+LOW_REQUESTS_REMAINING = 3
+LOW_TOKENS_REMAINING = 2000
+
+# Extra attempts after a 429 outlasts the client's own retries
+RATE_LIMIT_RETRIES = 5
+
+# Concurrent Haiku calls in interactive mode
+HAIKU_WORKERS = 5
+
+# Seconds between Message Batches status checks
+BATCH_POLL_INTERVAL = 10
+
+# On-disk response cache; identical requests within this window skip the API
+HAIKU_CACHE_DIR = 'data/haiku_cache'
+HAIKU_CACHE_TTL = 30 * 24 * 3600
+
+_client = None
+
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    """
+    Return the process-wide Anthropic client, creating it on first use.
+
+    Sharing one client keeps a single HTTP connection pool across every
+    enricher that runs in the process.
+    """
+    global _client
+    if _client is None:
+        load_dotenv()
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise ValueError("Please set ANTHROPIC_API_KEY in .env file")
+        _client = anthropic.Anthropic(api_key=api_key)
+    return _client
+
+
+class ResponseCache:
+    """
+    Haiku responses on disk, keyed by a SHA-256 of the request params.
+
+    Each entry is its own small JSON file, so concurrent workers never
+    contend for one file, and reruns over the same pages cost nothing.
+    """
+
+    def __init__(self, cache_dir: str = HAIKU_CACHE_DIR, ttl: float = HAIKU_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, params: Dict) -> str:
+        key = hashlib.sha256(json_io.dumps(params, sort_keys=True)).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, params: Dict) -> Optional[Any]:
+        """Cached response value for these params, or None."""
+        try:
+            entry = json_io.load_json(self._path(params))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('cached_at', 0) > self.ttl:
+            return None
+        return entry.get('value')
+
+    def set(self, params: Dict, value: Any):
+        """Store a response value (text or tool input) for these params."""
+        path = self._path(params)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json_io.dumps({'cached_at': time.time(), 'value': value}))
+        os.replace(tmp_path, path)
+
+
+def forced_tool(tool: Dict) -> Dict:
+    """
+    messages.create() params that make the model answer through `tool`.
+
+    The answer arrives as the tool call's input, already parsed and shaped
+    by the tool's input_schema, so there is no JSON to dig out of prose.
+    """
+    return {'tools': [tool], 'tool_choice': {'type': 'tool', 'name': tool['name']}}
+
+
+def response_value(message) -> Any:
+    """The tool call's input if the model made one, otherwise the response text."""
+    for block in message.content:
+        if block.type == 'tool_use':
+            return block.input
+    return message.content[0].text
+
+
+def run_message_batch(client, requests: Dict[str, Dict], poll_interval: float = BATCH_POLL_INTERVAL,
+                      cache: Optional[ResponseCache] = None) -> Dict[str, Any]:
+    """
+    Send messages.create() params as one Message Batches job and wait for it.
+
+    Batched requests cost half as much and don't count against the per-minute
+    rate limits, at the price of waiting for the whole job (usually minutes).
+
+    Args:
+        client: anthropic.Anthropic instance
+        requests: custom_id -> messages.create() params; ids may only use
+            letters, digits, '-' and '_'
+        poll_interval: Seconds between status checks
+        cache: Optional ResponseCache; cached requests are not resubmitted
+
+    Returns:
+        custom_id -> response value (see response_value), or None where the
+        request failed
+    """
+    values = dict.fromkeys(requests)
+    pending = {}
+    for custom_id, params in requests.items():
+        cached = cache.get(params) if cache else None
+        if cached is not None:
+            values[custom_id] = cached
+        else:
+            pending[custom_id] = params
+    if not pending:
+        return values
+
+    batch = client.messages.batches.create(
+        requests=[{'custom_id': custom_id, 'params': params} for custom_id, params in pending.items()]
+    )
+    while batch.processing_status != 'ended':
+        time.sleep(poll_interval)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type == 'succeeded':
+            value = response_value(entry.result.message)
+            values[entry.custom_id] = value
+            if cache:
+                cache.set(pending[entry.custom_id], value)
+    return values
+
+
+def prompt_blocks(instructions: str, details: str) -> List[Dict]:
+    """
+    User message content with the static instructions first, marked for prompt caching.
+
+    Anthropic caches the marked prefix for a few minutes, so back-to-back
+    calls only pay full price for the per-opportunity details. Prefixes
+    under the model's minimum cacheable length (2048 tokens for Haiku) are
+    simply sent uncached.
+    """
+    return [
+        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": details},
+    ]
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count for text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def fit_lines(lines: List[str], budget: int) -> str:
+    """Join lines in order until the next one would exceed `budget` tokens."""
+    kept = []
+    used = 0
+    for line in lines:
+        used += approx_tokens(line)
+        if used > budget:
+            break
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Cut text to about `budget` tokens, at a word boundary where possible."""
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(' ')
+    return cut[:space] if space > limit // 2 else cut
+
+
+def estimate_input_tokens(params: Dict) -> int:
+    """Rough input token count for messages.create() params (~4 characters per token)."""
+    chars = len(json_io.dumps(params['tools'])) if params.get('tools') else 0
+    for message in params.get('messages', []):
+        content = message['content']
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(block.get('text', '')) for block in content)
+    return chars // 4 + 1
+
+
+class RateLimiter:
+    """
+    Sliding one-minute windows over requests, input tokens and output tokens, shared by threads.
+
+    acquire() blocks until a call fits under all three limits, so a pool of
+    workers can run at the plan limit without tripping 429s. Input tokens
+    are estimated and output tokens reserved at max_tokens up front, then
+    settle() swaps in the real usage from the response. The windows are
+    only a local estimate; observe() and pause() let the server's own
+    rate-limit headers hold every worker back when real quota runs low.
+    """
+
+    def __init__(self, requests_per_minute: int = HAIKU_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = HAIKU_INPUT_TOKENS_PER_MINUTE,
+                 output_tokens_per_minute: int = HAIKU_OUTPUT_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.output_tokens_per_minute = output_tokens_per_minute
+        self._lock = threading.Lock()
+        self._calls = deque()  # [timestamp, input tokens, output tokens, in window] for the last minute
+        self._tokens = 0
+        self._output_tokens = 0
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """Hold back every acquire() for at least `seconds`."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers):
+        """Pause until the reported reset if the response headers show quota nearly spent."""
+        for kind, floor in (('requests', LOW_REQUESTS_REMAINING), ('input-tokens', LOW_TOKENS_REMAINING)):
+            remaining = headers.get(f'anthropic-ratelimit-{kind}-remaining')
+            reset = headers.get(f'anthropic-ratelimit-{kind}-reset')
+            if remaining is None or reset is None or int(remaining) >= floor:
+                continue
+            reset_at = datetime.fromisoformat(reset.replace('Z', '+00:00'))
+            self.pause(reset_at.timestamp() - time.time())
+
+    def acquire(self, tokens: int, output_tokens: int = 0) -> List:
+        """
+        Block until a call is allowed, then record it.
+
+        Args:
+            tokens: Estimated input tokens
+            output_tokens: Output tokens to reserve, normally the call's max_tokens
+
+        Returns:
+            The window entry, to pass to settle() once real usage is known
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0][0] >= 60:
+                    expired = self._calls.popleft()
+                    self._tokens -= expired[1]
+                    self._output_tokens -= expired[2]
+                    expired[3] = False
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    fits = (len(self._calls) < self.requests_per_minute
+                            and self._tokens + tokens <= self.tokens_per_minute
+                            and self._output_tokens + output_tokens <= self.output_tokens_per_minute)
+                    # An oversized call still goes through once the window is empty
+                    if fits or not self._calls:
+                        entry = [now, tokens, output_tokens, True]
+                        self._calls.append(entry)
+                        self._tokens += tokens
+                        self._output_tokens += output_tokens
+                        return entry
+                    wait = 60 - (now - self._calls[0][0])
+            time.sleep(wait)
+
+    def settle(self, entry: List, tokens: int, output_tokens: int):
+        """Replace an acquired call's estimates with the usage the API reported."""
+        with self._lock:
+            if entry[3]:
+                self._tokens += tokens - entry[1]
+                self._output_tokens += output_tokens - entry[2]
+            entry[1] = tokens
+            entry[2] = output_tokens
+
+
+def _retry_after(error: anthropic.RateLimitError) -> float:
+    """Seconds the server asked us to wait after a 429, defaulting to 1."""
+    try:
+        return float(error.response.headers.get('retry-after', 1))
+    except ValueError:
+        return 1.0
+
+
+def create_message(client, params: Dict, limiter: Optional[RateLimiter] = None):
+    """
+    messages.create() behind an optional shared rate limiter.
+
+    With a limiter, each response's rate-limit headers are fed back into it,
+    and a 429 pauses every worker for Retry-After plus jittered exponential
+    backoff before this call tries again.
+    """
+    if not limiter:
+        return client.messages.create(**params)
+
+    tokens = estimate_input_tokens(params)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        entry = limiter.acquire(tokens, params.get('max_tokens', 0))
+        try:
+            raw = client.messages.with_raw_response.create(**params)
+        except anthropic.RateLimitError as e:
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            limiter.pause(max(_retry_after(e), 2 ** attempt) + random.random())
+            continue
+        limiter.observe(raw.headers)
+        message = raw.parse()
+        usage = message.usage
+        limiter.settle(entry, usage.input_tokens + (usage.cache_creation_input_tokens or 0)
+                       + (usage.cache_read_input_tokens or 0), usage.output_tokens)
+        return message
+
+
+def complete(client, params: Dict, limiter: Optional[RateLimiter] = None,
+             cache: Optional[ResponseCache] = None) -> Any:
+    """Response value (see response_value) for messages.create() params, from cache when possible."""
+    if cache:
+        cached = cache.get(params)
+        if cached is not None:
+            return cached
+
+    value = response_value(create_message(client, params, limiter))
+    if cache:
+        cache.set(params, value)
+    return value
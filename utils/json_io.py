@@ -0,0 +1,154 @@
+"""
+JSON helpers for scraped opportunity files.
+Streams large files with ijson and parses with orjson when they are installed.
+"""
+
+import json
+import mmap
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator
+
+# Try to import ijson, but make it optional
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# orjson parses and serializes several times faster than the stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Files at least this large are memory-mapped for parsing; smaller ones (e.g.
+# cached Haiku responses) are cheaper to read outright
+MMAP_MIN_BYTES = 1 << 20
+
+def _default(value: Any) -> str:
+    """Fallback for values JSON can't represent: ISO 8601 for dates, str() otherwise."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+def loads(data) -> Any:
+    """Parse JSON from str or bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes; non-JSON values are handled as in save_json."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'), default=_default,
+                      ensure_ascii=False).encode('utf-8')
+
+def save_json(json_path, obj: Any, indent: bool = True) -> None:
+    """
+    Write obj to a JSON file, indented by default.
+    
+    Dates and datetimes are written as ISO 8601 strings; orjson encodes them
+    natively, without a Python callback. Any other value JSON can't
+    represent is written as str(value).
+    """
+    if ORJSON_AVAILABLE:
+        data = orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        data = json.dumps(obj, indent=2 if indent else None, default=_default, ensure_ascii=False).encode('utf-8')
+    with open(json_path, 'wb') as f:
+        f.write(data)
+
+def save_json_array(json_path, items: Iterable[Any]) -> int:
+    """
+    Write items to a JSON array file one element at a time; returns the count.
+    
+    Unlike save_json, the whole document is never held in memory as one
+    string, so items can be a generator. Formatting and the handling of
+    dates and other non-JSON values match save_json.
+    """
+    count = 0
+    with open(json_path, 'wb') as f:
+        f.write(b'[')
+        for item in items:
+            if ORJSON_AVAILABLE:
+                data = orjson.dumps(item, default=_default, option=orjson.OPT_INDENT_2)
+            else:
+                data = json.dumps(item, indent=2, default=_default, ensure_ascii=False).encode('utf-8')
+            f.write(b',\n' if count else b'\n')
+            f.write(data)
+            count += 1
+        f.write(b'\n]' if count else b']')
+    return count
+
+def _load_file(f) -> Any:
+    """
+    Parse an open binary JSON file.
+    
+    With orjson, large files are memory-mapped and parsed in place instead
+    of first being copied into a bytes object as large as the file.
+    """
+    if ORJSON_AVAILABLE and os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+    return loads(f.read())
+
+def load_json(json_path: str) -> Any:
+    """Read and parse a whole JSON file."""
+    with open(json_path, 'rb') as f:
+        return _load_file(f)
+
+def iter_opportunities(json_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield opportunities from a scraped JSON file one at a time.
+    
+    Accepts a bare list, a {"opportunities": [...]} wrapper, a single
+    opportunity object, or a .jsonl file with one opportunity per line.
+    With ijson installed, lists are streamed instead of loading the whole
+    document into memory.
+    
+    Args:
+        json_path: Path to the JSON file
+        
+    Yields:
+        Opportunity dictionaries
+    """
+    with open(json_path, 'rb') as f:
+        if str(json_path).endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+            return
+        
+        if IJSON_AVAILABLE:
+            # Peek at the first non-whitespace byte to pick the stream prefix
+            head = f.read(1)
+            while head and head.isspace():
+                head = f.read(1)
+            f.seek(0)
+            
+            if head == b'[':
+                yield from ijson.items(f, 'item', use_float=True)
+                return
+            
+            if head == b'{':
+                found = False
+                for opp in ijson.items(f, 'opportunities.item', use_float=True):
+                    found = True
+                    yield opp
+                if found:
+                    return
+                # Not a wrapper (or an empty one): fall through to a full load
+                f.seek(0)
+        
+        data = _load_file(f)
+    
+    # Handle different JSON formats
+    if isinstance(data, dict) and 'opportunities' in data:
+        yield from data['opportunities']
+    elif isinstance(data, list):
+        yield from data
+    else:
+        yield data
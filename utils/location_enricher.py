@@ -54,10 +54,46 @@ LOCATION_PATTERNS = [
     r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+([A-Z]{2})\b(?:[.\s]|$)',
 ]
 
+# Everything below is compiled once at import; enrichment runs these for every opportunity
+_CITY = r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
+
+_LOCATION_RES = [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in LOCATION_PATTERNS]
+
+# "gallery ... City, ST" style venue + location combinations, in VENUE_KEYWORDS order
+_VENUE_RES = [
+    re.compile(rf'{keyword}[^.]*?{_CITY}[,\s]+([A-Z]{{2}})', re.IGNORECASE)
+    for keyword in VENUE_KEYWORDS
+]
+
+# Patterns like "Gallery of Austin" or "New York Museum"
+_ORG_RES = [
+    re.compile(r'(?:of|in)\s+' + _CITY + r'[,\s]+([A-Z]{2})', re.IGNORECASE),
+    re.compile(_CITY + r'[,\s]+([A-Z]{2})\s+(?:' + '|'.join(VENUE_KEYWORDS) + ')', re.IGNORECASE),
+]
+
+_PARENTHETICAL_RE = re.compile(r'\(.*?\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ZIP_RE = re.compile(r'\s*\d{5}(?:-\d{4})?\s*')
+_ADDRESS_RE = re.compile(
+    r'\d+\s+[\w\s]+(?:St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Dr|Drive)[,\s]+' + _CITY + r'[,\s]+([A-Z]{2})',
+    re.IGNORECASE
+)
+_CANADA_CITY_RE = re.compile(_CITY + r'[,\s]+Canada', re.IGNORECASE)
+_UK_CITY_RE = re.compile(_CITY + r'[,\s]+(?:UK|United Kingdom)', re.IGNORECASE)
+_PROVINCE_CITY_RES = {
+    province: re.compile(_CITY + r'[,\s]+(?:' + province + '|' + abbrev + ')', re.IGNORECASE)
+    for province, abbrev in CANADIAN_PROVINCES.items()
+}
+_COUNTRY_CITY_RES = {
+    country: re.compile(_CITY + r'[,\s]+' + re.escape(country), re.IGNORECASE)
+    for country in COUNTRIES
+}
+
 
 def enrich_location(
     opportunity: Dict,
-    extract_from_description: bool = True
+    extract_from_description: bool = True,
+    standardized_cache: Optional[Dict[str, Optional[str]]] = None
 ) -> Dict:
     """
     Enrich location data for an opportunity with transparency.
@@ -65,6 +101,8 @@ def enrich_location(
     Args:
         opportunity: The opportunity dictionary
         extract_from_description: Whether to try extracting from description
+        standardized_cache: Optional dict memoizing standardize_location()
+            results, shared across a batch where the same location strings repeat
         
     Returns:
         Updated opportunity with enriched location data
@@ -91,7 +129,12 @@ def enrich_location(
             location_meta['extraction_source'] = 'field'
         else:
             # Try to standardize existing location
-            standardized = standardize_location(current_location)
+            if standardized_cache is None:
+                standardized = standardize_location(current_location)
+            elif current_location in standardized_cache:
+                standardized = standardized_cache[current_location]
+            else:
+                standardized = standardized_cache[current_location] = standardize_location(current_location)
             if standardized and standardized != 'Not Specified':
                 location_meta['enriched'] = standardized
                 location_meta['type'] = 'physical'
@@ -160,8 +203,8 @@ def standardize_location(location: str) -> Optional[str]:
         return 'Online'
     
     # Remove noise
-    location = re.sub(r'\(.*?\)', '', location)  # Remove parenthetical
-    location = re.sub(r'\s+', ' ', location).strip()
+    location = _PARENTHETICAL_RE.sub('', location)  # Remove parenthetical
+    location = _WHITESPACE_RE.sub(' ', location).strip()
     
     # Check for country (international)
     location_lower = location.lower()
@@ -172,7 +215,7 @@ def standardize_location(location: str) -> Optional[str]:
         for province, abbrev in CANADIAN_PROVINCES.items():
             if province in location_lower or f', {abbrev}' in location or f' {abbrev} ' in location:
                 # Check for city
-                city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+(?:' + province + '|' + abbrev + ')', location, re.IGNORECASE)
+                city_match = _PROVINCE_CITY_RES[province].search(location)
                 if city_match:
                     city = city_match.group(1)
                     city = ' '.join(word.capitalize() for word in city.split())
@@ -180,7 +223,7 @@ def standardize_location(location: str) -> Optional[str]:
                 else:
                     return f"{abbrev}, Canada"
         # Check for city without province
-        city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+Canada', location, re.IGNORECASE)
+        city_match = _CANADA_CITY_RE.search(location)
         if city_match:
             city = city_match.group(1)
             city = ' '.join(word.capitalize() for word in city.split())
@@ -190,7 +233,7 @@ def standardize_location(location: str) -> Optional[str]:
     
     # Handle UK special case
     if 'uk' in location_lower or 'united kingdom' in location_lower:
-        city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+(?:UK|United Kingdom)', location, re.IGNORECASE)
+        city_match = _UK_CITY_RE.search(location)
         if city_match:
             city = city_match.group(1)
             city = ' '.join(word.capitalize() for word in city.split())
@@ -201,7 +244,7 @@ def standardize_location(location: str) -> Optional[str]:
     for country in COUNTRIES:
         if country in location_lower and country not in ['united states', 'usa', 'canada', 'uk', 'united kingdom']:
             # Extract city/province if possible
-            city_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+' + re.escape(country), location, re.IGNORECASE)
+            city_match = _COUNTRY_CITY_RES[country].search(location)
             if city_match:
                 city = city_match.group(1)
                 # Proper case the city name
@@ -220,7 +263,7 @@ def standardize_location(location: str) -> Optional[str]:
             city = ' '.join(word.capitalize() for word in city.split())
             
             # Remove ZIP codes
-            state = re.sub(r'\s*\d{5}(?:-\d{4})?\s*', '', state).strip()
+            state = _ZIP_RE.sub('', state).strip()
             
             # Handle numeric state codes (for CAFE platform)
             if state.isdigit():
@@ -251,7 +294,7 @@ def standardize_location(location: str) -> Optional[str]:
                 return f"{city}, {state}"
     
     # Handle addresses with street patterns
-    address_match = re.search(r'\d+\s+[\w\s]+(?:St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Dr|Drive)[,\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+([A-Z]{2})', location, re.IGNORECASE)
+    address_match = _ADDRESS_RE.search(location)
     if address_match:
         city = address_match.group(1)
         state = address_match.group(2).upper()
@@ -280,8 +323,8 @@ def extract_location_from_text(text: str) -> Optional[Dict]:
         }
     
     # Try location patterns
-    for pattern in LOCATION_PATTERNS:
-        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+    for pattern in _LOCATION_RES:
+        match = pattern.search(text)
         if match:
             city = match.group(1).strip()
             state = match.group(2).strip()
@@ -301,9 +344,8 @@ def extract_location_from_text(text: str) -> Optional[Dict]:
             }
     
     # Look for venue + location combinations
-    for keyword in VENUE_KEYWORDS:
-        pattern = rf'{keyword}[^.]*?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+([A-Z]{{2}})'
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _VENUE_RES:
+        match = pattern.search(text)
         if match:
             city = match.group(1).strip()
             state = match.group(2).upper()
@@ -322,13 +364,8 @@ def extract_location_from_org(org: str) -> Optional[str]:
     Many orgs include city/state in their name.
     """
     # Patterns like "Gallery of Austin" or "New York Museum"
-    patterns = [
-        r'(?:of|in)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+([A-Z]{2})',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)[,\s]+([A-Z]{2})\s+(?:' + '|'.join(VENUE_KEYWORDS) + ')',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, org, re.IGNORECASE)
+    for pattern in _ORG_RES:
+        match = pattern.search(org)
         if match:
             city = match.group(1).strip()
             state = match.group(2).upper()
@@ -345,6 +382,9 @@ def batch_enrich_locations(opportunities: list) -> Tuple[list, Dict]:
     """
     Enrich locations for a batch of opportunities.
     
+    Standardized locations are memoized for the batch, so a location string
+    shared by many opportunities is only parsed once.
+    
     Returns:
         Tuple of (enriched opportunities, statistics)
     """
@@ -358,9 +398,10 @@ def batch_enrich_locations(opportunities: list) -> Tuple[list, Dict]:
         'by_confidence': {'high': 0, 'medium': 0, 'low': 0, 'not_specified': 0}
     }
     
+    standardized_cache = {}
     for opp in opportunities:
         original = opp.get('location', '')
-        enrich_location(opp)
+        enrich_location(opp, standardized_cache=standardized_cache)
         
         # Update stats
         if 'extras' in opp and 'location_metadata' in opp['extras']:
@@ -0,0 +1,49 @@
+"""
+Per-site request rate limiting for the scrapers.
+"""
+
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+# Requests per second allowed to any one site
+DEFAULT_MAX_PER_SECOND = 2.0
+
+# Requests an idle site may receive at once before the rate applies
+DEFAULT_BURST = 2
+
+
+def site_of(url: str) -> str:
+    """The registered domain of a URL, so org.artcall.org and artcall.org share a limit."""
+    host = urlsplit(url).hostname or ''
+    return '.'.join(host.split('.')[-2:])
+
+
+class HostRateLimiter:
+    """
+    Token bucket per site, shared by threads.
+
+    acquire() reserves the caller's slot under the lock and sleeps outside
+    it, so any number of worker threads can hit a site at exactly its rate
+    without a fixed per-request delay in each one.
+    """
+
+    def __init__(self, max_per_second: float = DEFAULT_MAX_PER_SECOND, burst: int = DEFAULT_BURST):
+        self.max_per_second = max_per_second
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}  # site -> monotonic time its bucket is next full
+
+    def acquire(self, url: str):
+        """Block until a request to the URL's site fits under its rate."""
+        site = site_of(url)
+        with self._lock:
+            interval = 1.0 / self.max_per_second
+            now = time.monotonic()
+            next_slot = max(self._next_slot.get(site, now), now)
+            # Up to `burst` requests may run ahead of the schedule
+            wait = next_slot - (self.burst - 1) * interval - now
+            self._next_slot[site] = next_slot + interval
+        if wait > 0:
+            time.sleep(wait)
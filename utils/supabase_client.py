@@ -0,0 +1,112 @@
+"""
+Shared Supabase client and bulk-write helpers for the standalone maintenance scripts.
+
+The client keeps its PostgREST session (and the underlying httpx connection
+pool) alive, so scripts that run several queries reuse one TLS connection
+instead of each building their own client.
+"""
+
+import os
+import atexit
+import httpx
+from typing import Dict, List
+from dotenv import load_dotenv
+from postgrest.utils import SyncClient
+from supabase import create_client, Client
+
+# HTTP/2 lets concurrent requests share one connection; httpx needs h2 for it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Keep-alive pool for PostgREST calls; sized for the enrichers' worker threads.
+# Idle connections are held for a minute so back-to-back phases reuse them.
+POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=60)
+
+# Rows per page for fetch_all(); PostgREST caps responses at 1000 rows by default
+PAGE_SIZE = 1000
+
+# Ids per DELETE; the id list goes in the query string, so keep it well under URL limits
+DELETE_BATCH_SIZE = 200
+
+# Rows per update_deadlines() call
+UPDATE_BATCH_SIZE = 500
+
+_client = None
+
+
+def create_pooled_client(url: str, key: str) -> Client:
+    """
+    Create a Supabase client whose PostgREST session uses POOL_LIMITS,
+    over HTTP/2 when h2 is installed.
+    
+    The session is closed when the process exits.
+    """
+    client = create_client(url, key)
+    session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=POOL_LIMITS,
+        http2=HTTP2_AVAILABLE,
+    )
+    session.close()
+    atexit.register(client.postgrest.session.close)
+    return client
+
+
+def get_client() -> Client:
+    """Return the process-wide Supabase client, creating it on first use."""
+    global _client
+    if _client is None:
+        load_dotenv()
+        _client = create_pooled_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    return _client
+
+
+def fetch_all(query, page_size: int = PAGE_SIZE) -> List[Dict]:
+    """
+    Run a select query page by page and return every row.
+    
+    The query must have a stable order (e.g. .order('id')) so pages don't
+    overlap or skip rows.
+    """
+    rows = []
+    offset = 0
+    while True:
+        # postgrest-py's range() end is exclusive (it sends Range: start-(end-1))
+        page = query.range(offset, offset + page_size).execute().data
+        if not page:
+            return rows
+        rows.extend(page)
+        # The server may cap a page below page_size, so advance by what came back
+        offset += len(page)
+
+
+def delete_opportunities(ids: List[str]) -> int:
+    """Delete opportunities by id, DELETE_BATCH_SIZE at a time; returns rows deleted."""
+    deleted = 0
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        response = get_client().table('opportunities').delete().in_(
+            'id', ids[start:start + DELETE_BATCH_SIZE]
+        ).execute()
+        deleted += len(response.data)
+    return deleted
+
+
+def update_deadlines(updates: List[Dict]) -> int:
+    """
+    Set deadline_parsed for a list of {'id', 'deadline_parsed'} rows.
+    
+    Sent UPDATE_BATCH_SIZE rows per update_deadlines() call (see
+    DATABASE_SETUP.md); returns rows updated.
+    """
+    updated = 0
+    for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+        updated += get_client().rpc('update_deadlines', {
+            'updates': updates[start:start + UPDATE_BATCH_SIZE]
+        }).execute().data or 0
+    return updated